@@ -0,0 +1 @@
+# makes `vesu_config` importable when pytest runs from the repository root
@@ -10,6 +10,8 @@ This notebook allows for the preparation of a configuration file from which new
 
 While developers are free to create and configure Vesu pools at their own liking, in this notebook we assume that the basic configuration is provided as an input and derive certain risk parameters programmatically.
 
+The stages of this notebook are also available as a library (`vesu_config.pipeline`) and through the `vesu-config` command line tool, which generates configurations from pool specs without running the notebook.
+
 # Input Parameters
 
 These parameters represent the basic configuration of a Vesu pool including the enabled supply assets and lending pairs.
@@ -484,51 +486,35 @@ Since pairwise prices are not available for all lending pairs, we compute those
 $$p(\verb'ETH/WBTC') = \frac{p(\verb'ETH/USD')}{p(\verb'WBTC/USD')}$$
 
 Furthermore, note that a Coingecko pro-account is needed in order to access an appropriate history of asset price data.
+
+Prices are fetched concurrently with a bounded number of requests in flight and a rate limiter that keeps us under the pro-API quota. Rate-limit and server errors are retried with backoff. For offline runs, `vesu_config.mock_server` serves synthetic price histories.
+
+Fetched prices are cached on disk (one Parquet file per coin), so a rerun only downloads the days that are missing from the cache.
 """
 
-import requests
-import pandas as pd
-from google.colab import userdata
+import logging
+import os
+from vesu_config.cache import PriceCache
+from vesu_config.fetch import fetch_all_prices
+
+logging.basicConfig(level=logging.INFO, format='%(message)s') # report fetch progress
+
+# fetch CG pro account API key from Colab secrets, or from the environment outside of Colab
+try:
+  from google.colab import userdata
+  cg_key = userdata.get('cg_key')
+except ImportError:
+  cg_key = os.environ.get('CG_KEY')
 
 # static params
-cg_key = userdata.get('cg_key')               # fetch CG pro account API key
-url = 'https://pro-api.coingecko.com/api/v3/' # CG pro endpoint
-currency = 'usd'                              # denote prices in USD
-days = 'max'                                  # max price history
-interval = 'daily'                            # daily prices
-
-# request function
-def fetch_prices(coin):
-  request = f'coins/{coin}/market_chart'
-  params = {
-          'x_cg_pro_api_key': cg_key,
-          'vs_currency': f'{currency}',
-          'days': f'{days}',
-          'interval': f'{interval}'
-  }
-  response = requests.get(url + request, params = params)
-
-  # error handling
-  if response.status_code == 200:
-          print(f'Successfully retrieved data for {coin}')
-          data = response.json()
-  else:
-          print(f'Failed to retrieve data for {coin}')
-
-  # convert to dataframe
-  df = pd.DataFrame(data['prices'])
-  df.columns = ['date',coin]
-  df['date'] = pd.to_datetime(df['date'], unit = 'ms')
-  df.set_index('date', drop = True, inplace=True)
-  return df
-
-# fetch data
+concurrency = 8                               # max requests in flight
+rate_limit = 250                              # max requests per minute (CG pro quota)
+cache = PriceCache('.price_cache')            # local cache, only missing days are fetched
+
+# fetch data concurrently, a coin that cannot be retrieved raises a FetchError
 coins = ['ethereum','wrapped-bitcoin','usd-coin','tether','wrapped-steth',
          'starknet']
-data = list(map(fetch_prices, coins))
-
-# join datasets
-prices = data[0].join(data[1:6], how='outer')
+prices = fetch_all_prices(coins, cg_key, concurrency=concurrency, rate_limit=rate_limit, cache=cache)
 
 # extract period
 start_date = '2022-01-01' # start of availability of all but STRK data
@@ -541,28 +527,27 @@ prices = prices.query('date >= @start_date and date <= @end_date')
 """## Compute Volatility
 
 We use a pessimistic volatility measure representing the "worst-case" volatility. This "worst-case" volatility is measured by the maximal daily price decline (negative log-return).
+
+Since pairwise prices are triangulated via USD, the log-return of a pair is the difference of the two per-asset log-returns. We therefore only keep the per-asset log-returns and compute the volatility of the lending pairs in `pair_parameters`.
 """
 
-from itertools import permutations
 import numpy as np
+from vesu_config.returns import log_returns, pair_volatility
 
-# compute pairwise prices
-prices_pairwise = pd.DataFrame()
-for p in permutations(prices.columns,2):
-        title = p
-        prices_pairwise[title] =  prices[p[0]]/prices[p[1]]
+# compute per-asset log returns
+returns = log_returns(prices)
 
-# compute log returns
-returns = np.log(prices_pairwise / prices_pairwise.shift(1))
-
-# volatility (daily, worst-case)
-volatility = returns.min(axis="rows").abs()
+# volatility (daily, worst-case) of the collateral asset denominated in the debt asset
+pairs = [(p["collateral_asset_name"], p["debt_asset_name"]) for p in pair_parameters]
+volatility = pair_volatility(returns, pairs)
 
 """## Fetch DEX liquidity
 
 We fetched the DEX liquidity from https://avnu.fi frontend.
 
 For a more robust and automated estimations, this should be based on an API and values should be averaged over an apropriate period.
+
+The liquidity of each pair is stored as a curve over the price impact depths. Liquidity at a depth between two measured points is interpolated, so a pair's liquidation discount does not need to match a measured depth exactly.
 """
 
 liquidity_data = [
@@ -928,7 +913,10 @@ liquidity_data = [
   }
 ]
 
-liquidity = pd.DataFrame(liquidity_data)
+from vesu_config.liquidity import liquidity_table
+
+# liquidity depth curve per (debt asset, collateral asset) pair
+liquidity = liquidity_table(liquidity_data)
 
 """## Compute Max Loan-to-Value
 
@@ -945,49 +933,24 @@ Where:
 * $\verb'LTV'$ - Pair's loan-to-value ratio
 """
 
+from vesu_config.ltv import compute_ltvs
+
 # Computed LTVs are appended to the pair_parameters dictionary
-for p in pair_parameters:
-  debt_asset_name = p["debt_asset_name"]
-  collateral_asset_name = p["collateral_asset_name"]
-  discount = np.round(1 - p["liquidation_discount"],2)
-  debt_cap = p["debt_cap"]
-  liq = liquidity.query("collateral_asset_name == @collateral_asset_name and debt_asset_name == @debt_asset_name and depth == @discount").liquidity.iloc[0]
-  vola = volatility[(collateral_asset_name, debt_asset_name)]
-  exponent = (1/p["risk_level_factor"]) * (vola / np.sqrt(liq / debt_cap))
-  ltv = np.exp(- exponent) - discount
-  p["max_ltv"] = np.round(ltv,2)
-  p["shutdown_ltv"] = 1
+# Pairs without liquidity data for their liquidation discount or without volatility are reported together in a MissingLiquidityError
+compute_ltvs(pair_parameters, volatility, liquidity)
 
 """# Write pool configuration to file"""
 
-import json
+from vesu_config.config import add_addresses, build_config, convert_rates, write_config
 
-# Convert per-annum to per-second interest rates
-# Note we format as a decimal string as otherwise python writes in scientific
-def to_per_second(per_annum_rate):
-  per_second_rate = (1+per_annum_rate)**(1/31104000) - 1
-  return f'{per_second_rate:.18f}'
-
-for a in asset_parameters:
-  a["min_full_utilization_rate"] = to_per_second(a["min_full_utilization_rate"])
-  a["max_full_utilization_rate"] = to_per_second(a["max_full_utilization_rate"])
-  a["initial_full_utilization_rate"] = to_per_second(a["initial_full_utilization_rate"])
-  a["zero_utilization_rate"] = to_per_second(a["zero_utilization_rate"])
+# Convert per-annum to per-second interest rates, exactly rounded to the contracts' 1e18 fixed point
+convert_rates(asset_parameters)
 
 # Add asset addresses to pair parameters
-for p in pair_parameters:
-  debt_asset_name = p["debt_asset_name"]
-  collateral_asset_name = p["collateral_asset_name"]
-  p["debt_asset"] = (asset_params.query('asset_name == @debt_asset_name').token.iloc[0])["address"]
-  p["collateral_asset"] = (asset_params.query('asset_name == @collateral_asset_name').token.iloc[0])["address"]
+add_addresses(pair_parameters, asset_parameters)
 
 # Combine parameters in single json
-parameters = {
-    "asset_parameters": asset_parameters,
-    "pair_parameters": pair_parameters,
-    "pool_parameters": pool_parameters
-}
+parameters = build_config(pool_parameters, asset_parameters, pair_parameters)
 
 # Convert and write JSON object to file
-with open("config_genesis_sn_main.json", "w") as outfile:
-    json.dump(parameters, outfile, indent=2)
+write_config(parameters, "config_genesis_sn_main.json")
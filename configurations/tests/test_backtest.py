@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from vesu_config.backtest import backtest
+
+PAIRS = [{"collateral_asset_name": "ethereum", "debt_asset_name": "usd-coin", "max_ltv": 0.82, "liquidation_discount": 0.9}]
+
+
+def _prices(ethereum):
+    index = pd.date_range('2024-01-01', periods=len(ethereum), freq='D')
+    return pd.DataFrame({"ethereum": ethereum, "usd-coin": 1.0}, index=index)
+
+
+def test_flat_prices_do_not_breach():
+    result = backtest(PAIRS, _prices(np.full(10, 3000.0)), horizons=[1])
+    row = result.loc[("ethereum", "usd-coin", 1)]
+    assert row.starts == 9
+    assert row.breaches == 0
+    assert row.breach_rate == 0
+    assert row.worst_shortfall == 0
+
+
+def test_rising_prices_do_not_breach():
+    result = backtest(PAIRS, _prices(np.linspace(3000, 6000, 30)), horizons=[1, 3, 7])
+    assert (result["breaches"] == 0).all()
+
+
+def test_crash_beyond_barrier_breaches():
+    # the debt exceeds the discounted collateral once ethereum falls below max_ltv / liquidation_discount of its start price
+    prices = _prices([3000.0, 3000.0, 2700.0, 2700.0])
+    row = backtest(PAIRS, prices, horizons=[1]).loc[("ethereum", "usd-coin", 1)]
+    assert row.breaches == 1
+    assert np.isclose(row.worst_shortfall, 1 - 0.9 * 0.9 / 0.82)
+    assert row.worst_start == pd.Timestamp('2024-01-02')
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from vesu_config.cache import PriceCache
+
+
+def _prices(coin, start, days):
+    index = pd.date_range(start, periods=days, freq='D', name='date')
+    return pd.DataFrame({coin: range(days)}, index=index, dtype=float)
+
+
+def test_missing_days(tmp_path):
+    cache = PriceCache(tmp_path)
+    assert cache.missing_days('bitcoin') is None
+    cache.update('bitcoin', _prices('bitcoin', '2024-01-01', 10), until=pd.Timestamp('2024-01-20'))
+    assert cache.missing_days('bitcoin', until=pd.Timestamp('2024-01-20')) == 10
+    assert cache.missing_days('bitcoin', until=pd.Timestamp('2024-01-05')) == 0
+
+
+def test_current_day_is_returned_but_not_stored(tmp_path):
+    cache = PriceCache(tmp_path)
+    until = pd.Timestamp('2024-01-10')
+    merged = cache.update('bitcoin', _prices('bitcoin', '2024-01-01', 10), until=until)
+    assert merged.index.max() == pd.Timestamp('2024-01-10')
+    assert cache.load('bitcoin').index.max() == pd.Timestamp('2024-01-09')
+
+    # the next run merges the missing tail, fetched rows win over cached ones
+    merged = cache.update('bitcoin', _prices('bitcoin', '2024-01-09', 4) + 100, until=pd.Timestamp('2024-01-12'))
+    assert merged.index.min() == pd.Timestamp('2024-01-01') and merged.index.max() == pd.Timestamp('2024-01-12')
+    assert merged.loc['2024-01-08', 'bitcoin'] == 7 and merged.loc['2024-01-09', 'bitcoin'] == 100
+    assert cache.load('bitcoin').index.max() == pd.Timestamp('2024-01-11')
+
+
+def test_sources_are_kept_apart(tmp_path):
+    cache = PriceCache(tmp_path)
+    live = cache.source('https://pro-api.coingecko.com/api/v3/')
+    mock = cache.source('http://127.0.0.1:8765/api/v3/')
+    assert live.directory != mock.directory != cache.source('http://127.0.0.1:8765/api/v3/', {'days': 30}).directory
+    assert live.directory == cache.source('https://pro-api.coingecko.com/api/v3').directory
+
+    mock.update('bitcoin', _prices('bitcoin', '2024-01-01', 5), until=pd.Timestamp('2024-02-01'))
+    assert mock.load('bitcoin') is not None
+    assert live.load('bitcoin') is None and live.missing_days('bitcoin') is None
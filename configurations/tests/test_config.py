@@ -0,0 +1,17 @@
+import numpy as np
+
+from vesu_config.config import RATE_FIELDS, convert_rates, exact_per_second, format_scaled, per_second_scaled
+
+
+def test_scaled_rates_are_exact():
+    rates = np.concatenate([np.linspace(0, 10, 2001), [1e-6, 0.025, 0.5, 0.9999]])
+    assert per_second_scaled(rates, verify=True).tolist() == [exact_per_second(r) for r in rates]
+
+
+def test_strings_hold_the_scaled_integers():
+    assets = [dict(zip(RATE_FIELDS, rates)) for rates in ([0.02, 3.0, 0.5, 0.0], [0.001, 10.0, 1.25, 0.01])]
+    scaled = convert_rates(assets, verify=True)
+    assert scaled.shape == (2, len(RATE_FIELDS))
+    assert [[int(a[field].replace('.', '')) for field in RATE_FIELDS] for a in assets] == scaled.tolist()
+    assert all(len(a[field].split('.')[1]) == 18 for a in assets for field in RATE_FIELDS)
+    assert format_scaled(-1) == '-0.000000000000000001'
@@ -0,0 +1,68 @@
+import copy
+import json
+from decimal import Decimal
+from pathlib import Path
+
+from vesu_config.diff import Change, diff_configs
+
+CONFIG = Path(__file__).parents[1] / 'config_genesis_sn_main.json'
+
+
+def _config():
+    with open(CONFIG) as infile:
+        return json.load(infile)
+
+
+def _short(address):
+    # same address, not zero padded and in upper case
+    return hex(int(address, 16)).upper().replace('0X', '0x')
+
+
+def test_entries_are_matched_by_address():
+    old = _config()
+    new = copy.deepcopy(old)
+    new["asset_parameters"].reverse()
+    new["pair_parameters"].reverse()
+    renamed = new["asset_parameters"][0]["asset_name"]
+    for a in new["asset_parameters"]:
+        a["token"]["address"] = _short(a["token"]["address"])
+        if a["asset_name"] == renamed:
+            a["asset_name"] = "renamed-coin"
+    for p in new["pair_parameters"]:
+        p["collateral_asset"], p["debt_asset"] = _short(p["collateral_asset"]), _short(p["debt_asset"])
+        p["collateral_asset_name"] = "renamed-coin" if p["collateral_asset_name"] == renamed else p["collateral_asset_name"]
+        p["debt_asset_name"] = "renamed-coin" if p["debt_asset_name"] == renamed else p["debt_asset_name"]
+
+    # only the renamed and reformatted fields change, no entry is added or removed
+    changes = diff_configs(old, new)
+    assert {(c.section, c.field) for c in changes} <= {
+        ("asset_parameters", "asset_name"), ("asset_parameters", "token.address"),
+        ("pair_parameters", "collateral_asset"), ("pair_parameters", "debt_asset"),
+        ("pair_parameters", "collateral_asset_name"), ("pair_parameters", "debt_asset_name")}
+    assert all(c.kind == 'changed' for c in changes)
+
+    pair = new["pair_parameters"][0]
+    old_ltv = pair["max_ltv"]
+    pair["max_ltv"] = round(old_ltv - 0.05, 2)
+    symbols = {_short(a["token"]["address"]): a["token"]["symbol"] for a in old["asset_parameters"]}
+    entry = f'{symbols[pair["collateral_asset"]]}/{symbols[pair["debt_asset"]]}'
+    ltv_changes = [c for c in diff_configs(old, new, file='config.json') if c.field == "max_ltv"]
+    assert ltv_changes == [Change('config.json', "pair_parameters", entry, "max_ltv", 'changed', old_ltv, pair["max_ltv"])]
+
+
+def test_rates_are_compared_with_tolerance():
+    old = _config()
+    new = copy.deepcopy(old)
+    asset = new["asset_parameters"][0]
+    rate = Decimal(asset["min_full_utilization_rate"])
+    asset["min_full_utilization_rate"] = float(rate)
+    assert diff_configs(old, new) == []
+
+    asset["min_full_utilization_rate"] = str(rate * (1 + Decimal('1e-12')))
+    assert diff_configs(old, new) == []
+    assert len(diff_configs(old, new, rel_tol=0)) == 1
+
+    asset["min_full_utilization_rate"] = str(rate * Decimal('1.01'))
+    changes = diff_configs(old, new)
+    assert [(c.section, c.entry, c.field, c.kind) for c in changes] == [
+        ("asset_parameters", asset["token"]["symbol"], "min_full_utilization_rate", 'changed')]
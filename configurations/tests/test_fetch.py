@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+from vesu_config.fetch import FetchError, fetch_all_prices, fetch_prices
+from vesu_config.mock_server import serve, synthetic_prices
+
+
+def test_injected_errors_are_retried():
+    with serve(days=30, failures=(429, 500)) as (url, handler):
+        prices = fetch_all_prices(['bitcoin', 'ethereum'], url=url, backoff_base=0.01)
+    assert handler.requests == 6
+    assert prices['bitcoin'].tolist() == [p for _, p in synthetic_prices('bitcoin', 30)]
+
+
+def test_non_retryable_status_raises():
+    with serve(failures=(404,)) as (url, handler):
+        with pytest.raises(FetchError, match='HTTP 404'):
+            fetch_prices('bitcoin', url=url, backoff_base=0.01)
+    assert handler.requests == 1
+
+
+def test_requests_in_flight_are_bounded():
+    with serve(days=10, delay=0.05) as (url, handler):
+        fetch_all_prices([f'coin-{i}' for i in range(8)], url=url, concurrency=3, rate_limit=60000)
+    assert handler.requests == 8
+    assert handler.peak == 3
+
+
+def test_histories_are_outer_joined():
+    with serve(days={'bitcoin': 30, 'starknet': 10}) as (url, handler):
+        prices = fetch_all_prices(['starknet', 'bitcoin'], url=url)
+    assert list(prices.columns) == ['starknet', 'bitcoin']
+    assert len(prices) == 30 and prices.index.is_monotonic_increasing
+    assert prices['starknet'].isna().sum() == 20
+    assert prices.index[-1] == prices['starknet'].last_valid_index() == pd.Timestamp('2022-01-30')
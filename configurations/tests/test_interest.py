@@ -0,0 +1,32 @@
+import numpy as np
+
+from vesu_config.interest import rate_model, simulate_rates
+
+ASSET = {"asset_name": "usd-coin", "target_utilization": 0.8, "min_target_utilization": 0.78, "max_target_utilization": 0.82,
+         "max_utilization": 0.95, "zero_utilization_rate": 0.01, "min_full_utilization_rate": 0.02, "max_full_utilization_rate": 3,
+         "initial_full_utilization_rate": 0.5, "rate_half_life": 86400, "target_rate_percent": 0.2}
+
+
+def test_time_at_bounds():
+    # a day at zero utilization, then a day in the target band, then a week at full utilization
+    model = rate_model([ASSET])
+    utilization = np.concatenate([np.zeros(24), np.full(24, 0.8), np.ones(24 * 7)])[:, None]
+    result = simulate_rates(model, utilization, dt=3600, chunk_size=16)
+    full = np.exp(np.log(model.initial_full_utilization_rate) - np.cumsum(np.log1p(np.full(24, 3600 / 86400))))
+    assert full[-1] > model.min_full_utilization_rate[0]
+    assert result.at_min[0] == 0
+    assert 0 < result.at_max[0] < 7 / 9
+    assert np.isclose(result.final_full_utilization_rate[0], model.max_full_utilization_rate[0])
+
+
+def test_time_at_min_bound():
+    model = rate_model([ASSET])
+    result = simulate_rates(model, np.zeros((24 * 30, 1)), dt=3600, chunk_size=100)
+    # at zero utilization every hour scales the full rate by 86400 / (86400 + 3600) until it reaches the floor
+    full, steps_at_min = model.initial_full_utilization_rate[0], 0
+    for _ in range(24 * 30):
+        full = max(full * 86400 / (86400 + 3600), model.min_full_utilization_rate[0])
+        steps_at_min += full == model.min_full_utilization_rate[0]
+    assert 0 < steps_at_min < 24 * 30
+    assert np.isclose(result.at_min[0], steps_at_min / (24 * 30))
+    assert result.at_max[0] == 0
@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+from vesu_config.liquidity import liquidity_table
+from vesu_config.ltv import DebtCapError, MissingLiquidityError, compute_debt_caps, compute_ltvs, smart_ltv, sweep
+
+
+def _pair(collateral, max_ltv=0.7):
+    return {"collateral_asset_name": collateral, "debt_asset_name": "usd-coin", "liquidation_discount": 0.9, "risk_level_factor": 5,
+            "max_ltv": max_ltv, "debt_cap": 50000000}
+
+
+def _inputs(volatility):
+    pairs = [(c, "usd-coin") for c in volatility]
+    liquidity = liquidity_table([{"debt_asset_name": d, "collateral_asset_name": c, "depth": 0.1, "liquidity": 1e6} for c, d in pairs])
+    return pd.Series(list(volatility.values()), index=pd.MultiIndex.from_tuples(pairs)), liquidity
+
+
+def test_debt_caps_reproduce_the_target_ltv():
+    volatility, liquidity = _inputs({"ethereum": 0.1, "starknet": 0.3})
+    pairs = [_pair("ethereum"), _pair("starknet")]
+    caps = compute_debt_caps(pairs, volatility, liquidity)
+    assert [p["debt_cap"] for p in pairs] == caps.astype(int).tolist()
+    compute_ltvs(pairs, volatility, liquidity)
+    assert [p["max_ltv"] for p in pairs] == [0.7, 0.7]
+
+
+def test_unlimited_cap_raises_without_max_debt_cap():
+    volatility, liquidity = _inputs({"ethereum": 0.0})
+    pairs = [_pair("ethereum")]
+    with pytest.raises(DebtCapError) as error:
+        compute_debt_caps(pairs, volatility, liquidity)
+    assert error.value.pairs == [("ethereum", "usd-coin", 'unlimited, set max_debt_cap')]
+    assert pairs[0]["debt_cap"] == 50000000
+
+    compute_debt_caps(pairs, volatility, liquidity, max_debt_cap=10 ** 9)
+    assert pairs[0]["debt_cap"] == 10 ** 9
+
+
+def test_unreachable_target_raises():
+    volatility, liquidity = _inputs({"ethereum": 0.1, "starknet": 0.1})
+    pairs = [_pair("ethereum"), _pair("starknet", max_ltv=0.95)]
+    with pytest.raises(DebtCapError) as error:
+        compute_debt_caps(pairs, volatility, liquidity, max_debt_cap=10 ** 9)
+    assert error.value.pairs == [("starknet", "usd-coin", 'target LTV unreachable')]
+    assert [p["debt_cap"] for p in pairs] == [50000000, 50000000]
+
+
+def test_sweep_accepts_scalar_grids():
+    volatility, liquidity = _inputs({"ethereum": 0.1, "starknet": 0.3})
+    pairs = [_pair("ethereum"), _pair("starknet")]
+    scalar = sweep(pairs, volatility, liquidity, liquidation_discounts=0.9, risk_level_factors=5, debt_caps=[1e6, 1e7])
+    grid = sweep(pairs, volatility, liquidity, liquidation_discounts=[0.9], risk_level_factors=[5], debt_caps=[1e6, 1e7])
+    assert scalar.ltv.shape == (2, 1, 1, 2)
+    assert (scalar.ltv == grid.ltv).all()
+    assert len(scalar.to_frame()) == 4
+
+
+def test_discount_between_measured_depths_is_interpolated():
+    # liquidity is measured at 5% and 10% price impact; a 0.945 discount is liquidated at 5.5%
+    volatility = pd.Series([0.1], index=pd.MultiIndex.from_tuples([("ethereum", "usd-coin")]))
+    liquidity = liquidity_table([{"debt_asset_name": "usd-coin", "collateral_asset_name": "ethereum", "depth": depth, "liquidity": value}
+                                 for depth, value in [(0.05, 1e6), (0.1, 3e6)]])
+    pair = dict(_pair("ethereum"), liquidation_discount=0.945)
+    expected = smart_ltv(0.1, 1.2e6, pair["debt_cap"], 5, 0.055)
+    compute_ltvs([pair], volatility, liquidity)
+    assert pair["max_ltv"] == round(float(expected), 2)
+    assert pair["max_ltv"] == round(float(sweep([pair], volatility, liquidity).ltv.squeeze()), 2)
+
+
+def test_missing_inputs_are_reported_per_pair():
+    volatility, liquidity = _inputs({"ethereum": 0.1, "starknet": 0.3})
+    pairs = [_pair("ethereum"), _pair("starknet"), _pair("wrapped-bitcoin")]
+    volatility = volatility.drop(("starknet", "usd-coin"))
+    with pytest.raises(MissingLiquidityError) as error:
+        compute_ltvs(pairs, volatility, liquidity)
+    assert error.value.pairs == [("usd-coin", "starknet", 0.1, ("volatility",)),
+                                 ("usd-coin", "wrapped-bitcoin", 0.1, ("liquidity", "volatility"))]
+    assert str(error.value) == ('Missing data for usd-coin/starknet (volatility), '
+                                'usd-coin/wrapped-bitcoin (liquidity at depth 0.1 and volatility)')
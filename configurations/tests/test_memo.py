@@ -0,0 +1,44 @@
+import vesu_config.ltv
+from vesu_config.memo import STAGE_VERSIONS, MemoCache, memo_ltvs
+
+from test_ltv import _inputs, _pair
+
+
+def _recording(monkeypatch):
+    computed = []
+    compute_ltvs = vesu_config.ltv.compute_ltvs
+
+    def record(pair_parameters, *args, **kwargs):
+        computed.append([p["collateral_asset_name"] for p in pair_parameters])
+        return compute_ltvs(pair_parameters, *args, **kwargs)
+
+    monkeypatch.setattr(vesu_config.ltv, 'compute_ltvs', record)
+    return computed
+
+
+def test_only_changed_pairs_are_recomputed(tmp_path, monkeypatch):
+    computed = _recording(monkeypatch)
+    cache = MemoCache(tmp_path / 'memo.sqlite')
+    volatility, liquidity = _inputs({"ethereum": 0.1, "starknet": 0.3, "wrapped-bitcoin": 0.2})
+    pairs = [_pair(c) for c in ("ethereum", "starknet", "wrapped-bitcoin")]
+    first = memo_ltvs(cache, pairs, volatility, liquidity)
+
+    pairs = [_pair(c) for c in ("ethereum", "starknet", "wrapped-bitcoin")]
+    pairs[1]["debt_cap"] = 10000000
+    second = memo_ltvs(cache, pairs, volatility, liquidity)
+    assert computed == [["ethereum", "starknet", "wrapped-bitcoin"], ["starknet"]]
+    assert second[0] == first[0] and second[2] == first[2] and second[1] > first[1]
+    assert [p["max_ltv"] for p in pairs] == second.tolist()
+
+
+def test_version_bump_invalidates_old_results(tmp_path, monkeypatch):
+    computed = _recording(monkeypatch)
+    cache = MemoCache(tmp_path / 'memo.sqlite')
+    volatility, liquidity = _inputs({"ethereum": 0.1, "starknet": 0.3})
+    memo_ltvs(cache, [_pair("ethereum"), _pair("starknet")], volatility, liquidity)
+    memo_ltvs(cache, [_pair("ethereum"), _pair("starknet")], volatility, liquidity)
+    assert len(computed) == 1
+
+    monkeypatch.setitem(STAGE_VERSIONS, "ltv", STAGE_VERSIONS["ltv"] + 1)
+    memo_ltvs(cache, [_pair("ethereum"), _pair("starknet")], volatility, liquidity)
+    assert computed[1:] == [["ethereum", "starknet"]]
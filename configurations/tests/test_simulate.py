@@ -0,0 +1,37 @@
+import numpy as np
+
+from vesu_config.simulate import _tail
+
+
+def _histogram(losses, bins=100):
+    # bin 0 holds paths without bad debt, bin k > 0 losses in ((k-1)/bins, k/bins]
+    index = np.where(losses > 0, np.ceil(losses * bins).astype(int), 0)
+    return np.bincount(index, minlength=bins + 1)[None, :]
+
+
+def test_sparse_tail_averages_only_the_worst_paths():
+    # 3 of 1000 paths lose, fewer than the 10 paths beyond the 99% quantile
+    losses = np.zeros(1000)
+    losses[:3] = [0.5, 0.3, 0.2]
+    var, cvar = _tail(_histogram(losses), 1000, np.array([1.0]), 0.99)
+    assert var[0] == 0
+    assert np.isclose(cvar[0], 1.0 / 10)
+
+
+def test_quantile_bin_is_split_by_the_remaining_count():
+    # 10 paths beyond the 99% quantile: the 5 worst at 0.8 and 5 of the 20 paths at 0.4
+    losses = np.zeros(1000)
+    losses[:5] = 0.8
+    losses[5:25] = 0.4
+    var, cvar = _tail(_histogram(losses), 1000, np.array([2.0]), 0.99)
+    assert np.isclose(var[0], 0.8)
+    assert np.isclose(cvar[0], 2.0 * (5 * 0.8 + 5 * 0.4) / 10)
+
+
+def test_tail_matches_sorted_losses():
+    rng = np.random.default_rng(0)
+    losses = np.where(rng.random(5000) < 0.05, np.ceil(rng.random(5000) * 100) / 100, 0)
+    var, cvar = _tail(_histogram(losses), 5000, np.array([1.0]), 0.99)
+    worst = np.sort(losses)[::-1][:50]
+    assert np.isclose(var[0], worst[-1])
+    assert np.isclose(cvar[0], worst.mean())
@@ -0,0 +1,80 @@
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+from vesu_config.validate import RULES, Validator, validate_files
+
+CONFIG = Path(__file__).parents[1] / 'config_genesis_sn_main.json'
+
+
+def _asset(field, value):
+    def mutate(config):
+        config["asset_parameters"][0][field] = value
+    return mutate
+
+
+def _pair(**fields):
+    def mutate(config):
+        config["pair_parameters"][0].update(fields)
+    return mutate
+
+
+def _same_assets(config):
+    pair = config["pair_parameters"][0]
+    pair["debt_asset_name"], pair["debt_asset"] = pair["collateral_asset_name"], pair["collateral_asset"]
+
+
+def _decimals(config):
+    config["asset_parameters"][0]["token"]["decimals"] = 256
+
+
+def _unlisted(config):
+    config["pair_parameters"][0]["collateral_asset_name"] = "unlisted-coin"
+
+
+def _duplicate(config):
+    config["pair_parameters"].append(copy.deepcopy(config["pair_parameters"][0]))
+
+
+def _missing(config):
+    del config["pair_parameters"][0]["max_ltv"]
+
+
+MUTATIONS = {
+    "utilization_order": _asset("min_target_utilization", 0.99),
+    "full_utilization_rate_order": _asset("min_full_utilization_rate", "1.0"),
+    "fee_rate": _asset("fee_rate", 2),
+    "target_rate_percent": _asset("target_rate_percent", 1.5),
+    "decimals": _decimals,
+    "max_ltv": _pair(max_ltv=1.0, shutdown_ltv=0),
+    "shutdown_ltv": _pair(max_ltv=0.8, shutdown_ltv=0.5),
+    "liquidation_discount": _pair(liquidation_discount=0),
+    "debt_cap": _pair(debt_cap=-1),
+    "distinct_assets": _same_assets,
+    "listed_asset": _unlisted,
+    "duplicate": _duplicate,
+    "schema": _missing
+}
+
+
+def _config():
+    with open(CONFIG) as infile:
+        return json.load(infile)
+
+
+def test_unchanged_configuration_is_valid():
+    assert validate_files([CONFIG]) == []
+
+
+def test_every_rule_is_covered():
+    assert {rule.name for rule in RULES} <= MUTATIONS.keys()
+
+
+@pytest.mark.parametrize('rule', MUTATIONS)
+def test_one_violation_per_rule(rule):
+    config = _config()
+    MUTATIONS[rule](config)
+    violations = Validator().validate([("config.json", config)])
+    assert [(v.file, v.rule) for v in violations] == [("config.json", rule)]
@@ -0,0 +1,45 @@
+import json
+
+import pandas as pd
+import pytest
+
+from vesu_config.benchmark import synthetic_universe
+from vesu_config.watch import Watcher
+
+
+def _watcher(tmp_path, window=None):
+    prices, liquidity, assets, pairs = synthetic_universe(3, days=100, seed=0)
+    spec = {"output": "config_test.json", "pool_parameters": {}, "asset_parameters": assets, "pair_parameters": pairs}
+    return Watcher([spec], prices, liquidity, tmp_path, threshold=0.0, window=window)
+
+
+@pytest.mark.parametrize('window', [None, 30])
+def test_incomplete_day_is_rejected(tmp_path, window):
+    watcher = _watcher(tmp_path, window)
+    day = watcher.last_day + pd.Timedelta(days=1)
+    last = dict(zip(watcher.columns, watcher.last_prices if window is None else watcher.incremental.last_prices))
+    with pytest.raises(ValueError, match='asset-1, asset-2'):
+        watcher.append_day(day, {"asset-0": last["asset-0"] * 0.7})
+    # nothing was applied, so the complete day still moves the pairs borrowing against asset-0
+    changed = watcher.append_day(day, dict(last, **{"asset-0": last["asset-0"] * 0.7}))
+    assert {watcher.pairs[i] for i in changed} >= {("asset-0", "asset-1"), ("asset-0", "asset-2")}
+
+
+def test_incomplete_drop_file_is_rejected_without_applying(tmp_path):
+    watcher = _watcher(tmp_path)
+    drop = tmp_path / 'drop'
+    drop.mkdir()
+    first = watcher.last_day
+    days = [str((first + pd.Timedelta(days=n)).date()) for n in (1, 2)]
+    last = dict(zip(watcher.columns, watcher.last_prices))
+    (drop / 'a.prices.json').write_text(json.dumps({"date": days[0], "prices": dict(last, **{"asset-0": last["asset-0"] * 0.7})}))
+    (drop / 'b.prices.json').write_text(json.dumps({"date": days[1], "prices": {"asset-0": last["asset-0"] * 0.5}}))
+    with pytest.raises(ValueError, match='b.prices.json'):
+        watcher.ingest(sorted(drop.glob('*.json')))
+    assert watcher.last_day == first
+
+    watcher.run(drop, iterations=1)
+    assert (drop / 'rejected' / 'b.prices.json').exists()
+    assert (drop / 'processed' / 'a.prices.json').exists()
+    assert watcher.last_day == pd.Timestamp(days[0])
+    assert (tmp_path / 'config_test.changes.json').exists()
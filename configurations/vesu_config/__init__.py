@@ -0,0 +1,6 @@
+"""
+Vesu pool configuration tooling.
+
+Library counterpart of the `generate_config_genesis.py` notebook: the stages used to derive the risk parameters of a Vesu pool are implemented
+here as plain functions so that they can be reused, tested offline and run at scale.
+"""
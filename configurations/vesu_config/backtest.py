@@ -0,0 +1,82 @@
+"""
+Historical backtest of Max LTVs.
+
+For every pair a position is opened at its `max_ltv` on every day of the price history. The position is breached when, within the
+holding horizon (the days it takes to liquidate), the collateral price in units of the debt asset falls so far that the collateral sold
+at the `liquidation_discount` no longer covers the debt:
+
+    max_ltv * p_start / p_t > liquidation_discount   <=>   log(p_t / p_start) < log(max_ltv / liquidation_discount)
+
+The shortfall of a breach is the uncovered part of the debt, 1 - liquidation_discount * p_t / (max_ltv * p_start).
+
+The worst price within each horizon after every start day is a forward rolling minimum of the pair's log price, computed for all pairs
+and start days at once with the block algorithm of `vesu_config.volatility.rolling_min`. Pairs are processed in chunks, so at most
+(T x chunk_size) values are materialized at a time.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .returns import pair_index
+from .volatility import rolling_min
+
+HORIZONS = (1, 3, 7)
+
+
+def forward_min(values, horizon):
+    """Minimum of rows t+1..t+horizon for every row t of a (T x P) array, NaN where the window leaves the array or holds no values."""
+    result = np.full(values.shape, np.nan)
+    if horizon < len(values):
+        result[:-horizon] = rolling_min(values, horizon)[horizon:]
+    return result
+
+
+def backtest(pair_parameters, prices, horizons=HORIZONS, chunk_size=1024):
+    """
+    Backtest the `max_ltv` of every pair against the `prices` history (a DataFrame or `PriceMatrix`, one column per CoinGecko id).
+
+    Returns a DataFrame indexed by (collateral, debt, horizon) with the number of start days, breaches, the breach rate, the worst
+    shortfall as a fraction of the debt, the worst price move within the horizon and the start day of the worst move.
+    """
+    pairs = [(p["collateral_asset_name"], p["debt_asset_name"]) for p in pair_parameters]
+    collateral, debt = pair_index(prices.columns, pairs)
+    max_ltv = np.array([p["max_ltv"] for p in pair_parameters], dtype=float)
+    discount = np.array([p["liquidation_discount"] for p in pair_parameters], dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_prices = np.log(np.asarray(prices.to_numpy(), dtype=float))
+        barrier = np.log(max_ltv / discount)
+    dates = prices.index
+
+    frames = []
+    for start in range(0, len(pairs), chunk_size):
+        end = start + chunk_size
+        pair_log = log_prices[:, collateral[start:end]] - log_prices[:, debt[start:end]]
+        for horizon in horizons:
+            with np.errstate(invalid='ignore'):
+                move = forward_min(pair_log, horizon) - pair_log
+            valid = ~np.isnan(move)
+            breached = valid & (move < barrier[start:end])
+            filled = np.where(valid, move, np.inf)
+            worst_day = filled.argmin(axis=0)
+            worst_move = filled[worst_day, np.arange(filled.shape[1])]
+            any_valid = valid.any(axis=0)
+            worst_move = np.where(any_valid, worst_move, np.nan)
+            shortfall = np.maximum(1 - discount[start:end] * np.exp(worst_move) / max_ltv[start:end], 0)
+            starts = valid.sum(axis=0)
+            frames.append(pd.DataFrame({
+                "collateral_asset_name": [c for c, _ in pairs[start:end]],
+                "debt_asset_name": [d for _, d in pairs[start:end]],
+                "horizon": horizon,
+                "max_ltv": max_ltv[start:end],
+                "liquidation_discount": discount[start:end],
+                "starts": starts,
+                "breaches": breached.sum(axis=0),
+                "breach_rate": np.where(starts > 0, breached.sum(axis=0) / np.maximum(starts, 1), np.nan),
+                "worst_shortfall": np.where(any_valid, shortfall, np.nan),
+                "worst_move": worst_move,
+                "worst_start": np.where(any_valid, dates[worst_day], pd.NaT)
+            }))
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True).set_index(["collateral_asset_name", "debt_asset_name", "horizon"]).sort_index(level="horizon", sort_remaining=False)
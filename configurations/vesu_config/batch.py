@@ -0,0 +1,143 @@
+"""
+Batch generation of pool configurations.
+
+A pool spec is a JSON file (or dict) with the inputs of one pool, i.e. the input parameters of the notebook:
+
+    {
+      "output": "config_genesis_sn_main.json",
+      "pool_parameters": {...},
+      "asset_parameters": [...],   # per-annum rates, `asset_name` is the CoinGecko id
+      "pair_parameters": [...],
+      "liquidity_data": [...]      # optional, merged with the liquidity of all other specs
+    }
+
+The stages shared by all pools (price fetch, log returns, pair volatility and the liquidity table) are computed once. The per-pool LTV
+and rate work is spread across a process pool. With a `vesu_config.memo.MemoCache`, pair volatilities, LTVs and rates are only recomputed
+for the pairs and assets whose inputs changed since an earlier run.
+
+    vesu-config generate specs/*.json --out-dir . --start-date 2022-01-01 --end-date 2024-04-30
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .config import add_addresses, build_config, convert_rates, write_config
+from .instrument import Recorder, active, stage
+from .liquidity import liquidity_table
+from .ltv import compute_ltvs
+from .memo import memo_ltvs, memo_pair_volatility, memo_rates
+from .returns import log_returns, pair_volatility
+from .spec import load_spec
+from .store import PriceMatrix, window
+
+# state shared with the worker processes, set once per worker by `_init_worker`
+_shared = {}
+
+
+def spec_coins(specs):
+    """CoinGecko ids of all assets across `specs`, in order of first appearance."""
+    return list(dict.fromkeys(a["asset_name"] for spec in specs for a in spec["asset_parameters"]))
+
+
+def spec_pairs(specs):
+    """(collateral, debt) pairs across `specs`, in order of first appearance."""
+    return list(dict.fromkeys((p["collateral_asset_name"], p["debt_asset_name"]) for spec in specs for p in spec["pair_parameters"]))
+
+
+def spec_liquidity(specs, liquidity_data=()):
+    """Union of `liquidity_data` and the liquidity rows of all specs, with exact duplicates dropped."""
+    rows = list(liquidity_data) + [row for spec in specs for row in spec.get("liquidity_data", [])]
+    unique = {(r["debt_asset_name"], r["collateral_asset_name"], r["depth"], r["liquidity"]): r for r in rows}
+    return list(unique.values())
+
+
+def build_pool(spec, volatility, liquidity, memo=None):
+    """Per-pool stage: compute the Max LTVs, convert the rates, add addresses and return the pool configuration."""
+    pool = spec.get("output")
+    with stage('ltv', pool=pool, pairs=len(spec["pair_parameters"])):
+        if memo is None:
+            compute_ltvs(spec["pair_parameters"], volatility, liquidity)
+        else:
+            memo_ltvs(memo, spec["pair_parameters"], volatility, liquidity)
+    with stage('rates', pool=pool, assets=len(spec["asset_parameters"])):
+        if memo is None:
+            convert_rates(spec["asset_parameters"])
+        else:
+            memo_rates(memo, spec["asset_parameters"])
+    with stage('addresses', pool=pool, pairs=len(spec["pair_parameters"])):
+        add_addresses(spec["pair_parameters"], spec["asset_parameters"])
+    return build_config(spec["pool_parameters"], spec["asset_parameters"], spec["pair_parameters"])
+
+
+def _init_worker(volatility, liquidity, profile, memo):
+    _shared["volatility"] = volatility
+    _shared["liquidity"] = liquidity
+    _shared["profile"] = profile
+    _shared["memo"] = memo
+
+
+def _build_pool_worker(spec):
+    # records of the worker's stages are sent back to the parent's recorder, if any
+    if _shared["profile"] is None:
+        return build_pool(spec, _shared["volatility"], _shared["liquidity"], _shared["memo"]), []
+    recorder = Recorder(profile=_shared["profile"])
+    with recorder.activate():
+        parameters = build_pool(spec, _shared["volatility"], _shared["liquidity"], _shared["memo"])
+    return parameters, recorder.records
+
+
+def generate_all(specs, prices, liquidity_data=(), workers=None, memo=None):
+    """
+    Generate the configurations of all `specs` from shared `prices`, a `PriceMatrix` or a DataFrame (one column per CoinGecko id).
+
+    Returns a list of pool configurations in the order of `specs`. With `workers=1` everything runs in the current process. `memo` is an
+    optional `MemoCache` of earlier stage results.
+    """
+    specs = [load_spec(spec) for spec in specs]
+    if not isinstance(prices, PriceMatrix):
+        prices = PriceMatrix.from_frame(prices)
+
+    # shared stages
+    with stage('returns', days=len(prices), assets=len(prices.columns)):
+        returns = log_returns(prices)
+    pairs = spec_pairs(specs)
+    with stage('volatility', pairs=len(pairs)):
+        volatility = pair_volatility(returns, pairs) if memo is None else memo_pair_volatility(memo, returns, pairs)
+    rows = spec_liquidity(specs, liquidity_data)
+    with stage('liquidity', rows=len(rows)):
+        liquidity = liquidity_table(rows)
+
+    # per-pool stages
+    workers = workers or min(len(specs), os.cpu_count() or 1)
+    if workers <= 1:
+        return [build_pool(spec, volatility, liquidity, memo) for spec in specs]
+    recorder = active()
+    profile = recorder.profile if recorder is not None else None
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(volatility, liquidity, profile, memo)) as pool:
+        results = list(pool.map(_build_pool_worker, specs))
+    if recorder is not None:
+        for _, records in results:
+            recorder.extend(records)
+    return [parameters for parameters, _ in results]
+
+
+def run(spec_paths, out_dir='.', start_date=None, end_date=None, liquidity_data=(), prices=None, workers=None, memo=None, **fetch_kwargs):
+    """Fetch prices once for all specs, generate every configuration and write it to `out_dir`. Returns the written paths."""
+    specs = [load_spec(path) for path in spec_paths]
+    if prices is None:
+        from .fetch import fetch_all_prices
+        coins = spec_coins(specs)
+        with stage('fetch', coins=len(coins)):
+            prices = fetch_all_prices(coins, **fetch_kwargs)
+    prices = window(prices, start_date, end_date)
+
+    configs = generate_all(specs, prices, liquidity_data, workers=workers, memo=memo)
+
+    paths = []
+    with stage('emit', files=len(configs)):
+        for spec, parameters in zip(specs, configs):
+            path = Path(out_dir) / spec["output"]
+            write_config(parameters, path)
+            paths.append(path)
+    return paths
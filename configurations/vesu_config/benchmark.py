@@ -0,0 +1,174 @@
+"""
+Pipeline benchmarks on a synthetic asset universe.
+
+For N assets a synthetic universe is generated offline: daily price histories (geometric random walks, some assets listed late), liquidity
+rows for every ordered pair at the 5% and 10% depths, asset parameters and all N·(N-1) lending pairs. Every pipeline stage is timed
+(best of `repeat` runs) and its peak traced memory is recorded in a separate run under `tracemalloc`.
+
+Results are written as JSON and can be compared against a baseline to detect regressions:
+
+    vesu-config bench --assets 6 50 200 --out bench.json
+    vesu-config bench --assets 6 50 --compare bench.json
+"""
+
+import datetime
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from itertools import permutations
+
+import numpy as np
+import pandas as pd
+
+from .config import add_addresses, build_config, convert_rates, write_config
+from .instrument import _peak_rss
+from .liquidity import liquidity_table
+from .ltv import compute_ltvs
+from .returns import log_returns, pair_volatility
+
+DEPTHS = (0.05, 0.1)
+STAGES = ["returns", "volatility", "liquidity", "ltv", "rates", "emit"]
+
+
+def synthetic_universe(n_assets, days=1000, seed=0):
+    """Synthetic prices, liquidity rows, asset parameters and pair parameters for `n_assets` assets."""
+    rng = np.random.default_rng(seed)
+    names = [f'asset-{i}' for i in range(n_assets)]
+
+    log_prices = np.cumsum(rng.normal(0, rng.uniform(0.01, 0.06, n_assets), (days, n_assets)), axis=0) + rng.uniform(-2, 8, n_assets)
+    prices = pd.DataFrame(np.exp(log_prices), columns=names, index=pd.date_range('2022-01-01', periods=days, name='date'))
+    # a fifth of the assets are only listed later, like STRK
+    late = rng.choice(n_assets, n_assets // 5, replace=False)
+    for i, start in zip(late, rng.integers(0, days // 2, len(late))):
+        prices.iloc[:start, i] = np.nan
+
+    asset_parameters = [{
+        "asset_name": name,
+        "token": {"address": f'0x{i:064x}', "name": name, "symbol": name.upper(), "decimals": 18, "is_legacy": False},
+        "min_full_utilization_rate": 0.005,
+        "max_full_utilization_rate": 2,
+        "initial_full_utilization_rate": 0.5,
+        "zero_utilization_rate": 0.001
+    } for i, name in enumerate(names)]
+
+    pair_parameters = [{
+        "debt_asset_name": debt,
+        "collateral_asset_name": collateral,
+        "liquidation_discount": float(rng.choice([0.9, 0.95])),
+        "risk_level_factor": int(rng.choice([3, 5])),
+        "debt_cap": 50000000
+    } for debt, collateral in permutations(names, 2)]
+
+    liquidity = rng.uniform(5e5, 5e6, (len(pair_parameters), len(DEPTHS)))
+    liquidity_data = [{
+        "depth": depth,
+        "debt_asset_name": p["debt_asset_name"],
+        "collateral_asset_name": p["collateral_asset_name"],
+        "liquidity": float(liquidity[i, j])
+    } for j, depth in enumerate(DEPTHS) for i, p in enumerate(pair_parameters)]
+
+    return prices, liquidity_data, asset_parameters, pair_parameters
+
+
+def _stages(prices, liquidity_data, asset_parameters, pair_parameters, out_path):
+    # each stage takes the state produced so far and returns (state updates, row/pair count)
+    def returns(s):
+        return {"returns": log_returns(s["prices"])}, len(s["prices"])
+
+    def volatility(s):
+        pairs = [(p["collateral_asset_name"], p["debt_asset_name"]) for p in s["pair_parameters"]]
+        return {"volatility": pair_volatility(s["returns"], pairs)}, len(pairs)
+
+    def liquidity(s):
+        return {"liquidity": liquidity_table(s["liquidity_data"])}, len(s["liquidity_data"])
+
+    def ltv(s):
+        pair_parameters = [dict(p) for p in s["pair_parameters"]]
+        compute_ltvs(pair_parameters, s["volatility"], s["liquidity"])
+        return {"pair_parameters": pair_parameters}, len(pair_parameters)
+
+    def rates(s):
+        asset_parameters = [dict(a) for a in s["asset_parameters"]]
+        convert_rates(asset_parameters)
+        return {"asset_parameters": asset_parameters}, len(asset_parameters)
+
+    def emit(s):
+        pair_parameters = [dict(p) for p in s["pair_parameters"]]
+        add_addresses(pair_parameters, s["asset_parameters"])
+        write_config(build_config({"name": "bench"}, s["asset_parameters"], pair_parameters), out_path)
+        return {}, len(pair_parameters)
+
+    state = {"prices": prices, "liquidity_data": liquidity_data, "asset_parameters": asset_parameters, "pair_parameters": pair_parameters}
+    return state, dict(zip(STAGES, [returns, volatility, liquidity, ltv, rates, emit]))
+
+
+def run_benchmark(n_assets, days=1000, repeat=3, memory=True, seed=0):
+    """Benchmark every stage for a universe of `n_assets` assets. Returns one result dict per stage."""
+    universe = synthetic_universe(n_assets, days, seed)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        state, stages = _stages(*universe, os.path.join(tmp, 'config.json'))
+        for name in STAGES:
+            stage = stages[name]
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                updates, count = stage(state)
+                timings.append(time.perf_counter() - start)
+
+            peak = None
+            if memory:
+                tracemalloc.start()
+                stage(state)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+            state.update(updates)
+            results.append({"assets": n_assets, "pairs": len(universe[3]), "days": days, "stage": name, "count": count,
+                            "seconds": min(timings), "peak_bytes": peak})
+    return results
+
+
+def run_suite(asset_counts=(6, 50, 200), days=1000, repeat=3, memory=True, seed=0):
+    """Run `run_benchmark` for every universe size and return the results together with environment metadata."""
+    results = [r for n in asset_counts for r in run_benchmark(n, days, repeat, memory, seed)]
+    meta = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "max_rss_bytes": _peak_rss()
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Compare two suite results. Returns a list of (assets, stage, baseline seconds, current seconds) for every stage that got slower by
+    more than `threshold` (relative).
+    """
+    base = {(r["assets"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        b = base.get((r["assets"], r["stage"]))
+        if b is not None and r["seconds"] > b["seconds"] * (1 + threshold):
+            regressions.append((r["assets"], r["stage"], b["seconds"], r["seconds"]))
+    return regressions
+
+
+def format_results(suite):
+    lines = [f'{"assets":>6} {"pairs":>7} {"stage":<11} {"seconds":>10} {"peak MB":>9}']
+    for r in suite["results"]:
+        peak = f'{r["peak_bytes"] / 2 ** 20:9.1f}' if r["peak_bytes"] is not None else f'{"-":>9}'
+        lines.append(f'{r["assets"]:>6} {r["pairs"]:>7} {r["stage"]:<11} {r["seconds"]:10.4f} {peak}')
+    return '\n'.join(lines)
+
+
+def write_results(suite, path):
+    with open(path, 'w') as outfile:
+        json.dump(suite, outfile, indent=2)
@@ -0,0 +1,70 @@
+"""
+Incremental on-disk price cache.
+
+Each coin's daily price history is stored as a single Parquet file keyed by its CoinGecko id. Only completed days (before today, UTC)
+are persisted, so a rerun only needs to request the days after the last cached date. Prices of different sources (API base url and
+query parameters, e.g. a local mock server) are kept apart in one subdirectory per source, see `PriceCache.source`.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+
+def today():
+    """Midnight of the current UTC day, the first day that is not yet complete."""
+    return pd.Timestamp.now(tz='UTC').tz_localize(None).normalize()
+
+
+class PriceCache:
+    """Directory of `<coin>.parquet` files, one date indexed price column per coin."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def source(self, url, params=None):
+        """The cache of the prices fetched from `url` with the query `params`, a subdirectory named after the host and a digest of both."""
+        key = json.dumps([url.rstrip('/'), params or {}], sort_keys=True, default=str)
+        return PriceCache(self.directory / f'{urlsplit(url).netloc.replace(":", "_") or "local"}-{hashlib.sha256(key.encode()).hexdigest()[:12]}')
+
+    def path(self, coin):
+        return self.directory / f'{coin}.parquet'
+
+    def load(self, coin):
+        """Cached prices of `coin`, or None if nothing has been cached yet."""
+        path = self.path(coin)
+        if not path.exists():
+            return None
+        return pd.read_parquet(path)
+
+    def missing_days(self, coin, until=None):
+        """Number of days to request to bring `coin` up to date, or None if the full history is needed."""
+        cached = self.load(coin)
+        if cached is None or cached.empty:
+            return None
+        until = until if until is not None else today()
+        return max(0, (until - cached.index.max().normalize()).days)
+
+    def update(self, coin, df, until=None):
+        """
+        Merge freshly fetched prices into the cache and return the full history.
+
+        Fetched rows win over cached rows for the same date. Rows from the current (incomplete) day are returned but not stored.
+        """
+        until = until if until is not None else today()
+        cached = self.load(coin)
+        merged = df if cached is None else pd.concat([cached, df])
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+
+        complete = merged[merged.index < until]
+        if cached is None or not complete.equals(cached):
+            # write atomically so an interrupted run never leaves a corrupt file behind
+            tmp = self.path(coin).with_suffix('.parquet.tmp')
+            complete.to_parquet(tmp)
+            os.replace(tmp, self.path(coin))
+        return merged
@@ -0,0 +1,378 @@
+"""
+`vesu-config` command line interface.
+
+    vesu-config generate specs/*.json --out-dir . --start-date 2022-01-01 --end-date 2024-04-30
+    vesu-config fetch ethereum starknet --out prices.parquet
+    vesu-config check specs/*.json --registry
+    vesu-config watch specs/*.json --drop-dir drop --interval 86400
+    vesu-config backtest config_genesis_sn_main.json --prices prices.parquet --horizons 1 3 7
+    vesu-config stress --shock starknet=-0.4 ethereum=-0.25
+    vesu-config rates config_genesis_sn_main.json --steps 1000000 --dt 60 --rate-half-life 86400
+    vesu-config diff --rev HEAD config_*.json
+    vesu-config validate
+    vesu-config lookup STRK 0x021fe2ca1b7e731e4a5ef7df2881356070c5d72db4b2d19f9195f6b641f75df0
+    vesu-config bench --assets 6 50 200 --out bench.json
+
+Commands import the numerical stack only when they run, so `--help` and `check` start without loading pandas or requests.
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+from contextlib import nullcontext
+
+
+def cmd_generate(args):
+    from .batch import run
+    from .cache import PriceCache
+    from .instrument import Recorder
+    from .memo import MemoCache
+
+    memo = None if args.no_memo else MemoCache(args.memo_file, max_bytes=args.memo_max_mb * 2 ** 20)
+    liquidity_data = _load_json(args.liquidity) if args.liquidity else ()
+    fetch_kwargs = {'api_key': os.environ.get(args.api_key_env), 'concurrency': args.concurrency, 'rate_limit': args.rate_limit,
+                    'cache': PriceCache(args.cache_dir), 'dtype': 'float32' if args.float32 else 'float64'}
+    if args.url:
+        fetch_kwargs['url'] = args.url
+
+    recorder = Recorder(profile=args.profile)
+    with recorder.activate() if args.report or args.profile else nullcontext():
+        paths = run(args.specs, args.out_dir, args.start_date, args.end_date, liquidity_data, workers=args.workers, memo=memo,
+                    **fetch_kwargs)
+    for path in paths:
+        print(f'Wrote {path}')
+
+    if recorder.records:
+        print(recorder.format())
+    if args.report:
+        with open(args.report, 'w') as outfile:
+            json.dump(recorder.report(), outfile, indent=2)
+        print(f'Wrote run report to {args.report}')
+    return 0
+
+
+def cmd_fetch(args):
+    from .pipeline import fetch
+
+    kwargs = {'concurrency': args.concurrency, 'rate_limit': args.rate_limit}
+    if args.url:
+        kwargs['url'] = args.url
+    prices = fetch(args.coins, os.environ.get(args.api_key_env), cache_dir=args.cache_dir, **kwargs)
+    prices.to_parquet(args.out)
+    print(f'Wrote {len(prices)} days of prices for {len(prices.columns)} coins to {args.out}')
+    return 0
+
+
+def cmd_check(args):
+    from .registry import Registry
+    from .spec import check_spec, load_spec
+
+    registry = Registry.load(args.root) if args.registry else None
+    failed = 0
+    for path in args.specs:
+        problems = check_spec(load_spec(path), registry)
+        for problem in problems:
+            print(f'{path}: {problem}')
+        failed += bool(problems)
+    print(f'{len(args.specs) - failed}/{len(args.specs)} specs ok')
+    return 1 if failed else 0
+
+
+def cmd_watch(args):
+    from .batch import spec_coins
+    from .cache import PriceCache, today
+    from .fetch import fetch_all_prices
+    from .spec import load_spec
+    from .watch import Watcher
+
+    liquidity_data = _load_json(args.liquidity) if args.liquidity else ()
+    fetch_kwargs = {'api_key': os.environ.get(args.api_key_env), 'concurrency': args.concurrency, 'rate_limit': args.rate_limit,
+                    'cache': PriceCache(args.cache_dir)}
+    if args.url:
+        fetch_kwargs['url'] = args.url
+    specs = [load_spec(path) for path in args.specs]
+    prices = fetch_all_prices(spec_coins(specs), **fetch_kwargs).loc[args.start_date:]
+    prices = prices[prices.index < today()]  # the current day is incomplete
+
+    watcher = Watcher(specs, prices, liquidity_data, args.out_dir, threshold=args.threshold, window=args.window)
+    print(f'Watching {args.drop_dir} for {len(specs)} pools')
+    watcher.run(args.drop_dir, poll=args.poll, interval=args.interval, fetch_kwargs=fetch_kwargs)
+    return 0
+
+
+def cmd_backtest(args):
+    import pandas as pd
+
+    from .backtest import backtest
+
+    prices = pd.read_parquet(args.prices).loc[args.start_date:args.end_date]
+    frames = []
+    for path in args.configs:
+        result = backtest(_load_json(path)["pair_parameters"], prices, horizons=args.horizons)
+        frames.append(pd.concat({os.path.basename(path): result}, names=["config"]))
+    result = pd.concat(frames)
+    breached = result[result["breaches"] > 0]
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 200):
+        print(breached if len(breached) else 'no breaches')
+    if args.out:
+        result.reset_index().to_csv(args.out, index=False)
+        print(f'Wrote {args.out}')
+    return 1 if len(breached) else 0
+
+
+def cmd_stress(args):
+    import pandas as pd
+
+    from .stress import load_scenarios, stress, summarize
+
+    scenarios = load_scenarios(args.scenarios) if args.scenarios else {}
+    if args.shock:
+        try:
+            shocks = {asset: float(shock) for asset, shock in (s.split('=', 1) for s in args.shock)}
+        except ValueError:
+            print('--shock expects <CoinGecko id>=<shock>, e.g. starknet=-0.4', file=sys.stderr)
+            return 2
+        scenarios[' '.join(args.shock)] = shocks
+    if not scenarios:
+        print('No scenarios, use --scenarios or --shock', file=sys.stderr)
+        return 2
+    paths = args.configs or sorted(glob.glob(os.path.join(args.root, 'configurations', 'config_*.json')))
+    configs = [(os.path.basename(path), _load_json(path)) for path in paths]
+    summary = summarize(stress(configs, scenarios, utilization=args.utilization))
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 200):
+        print(summary)
+    if args.out:
+        summary.reset_index().to_csv(args.out, index=False)
+        print(f'Wrote {args.out}')
+    return 0
+
+
+def cmd_rates(args):
+    import numpy as np
+    import pandas as pd
+
+    from .interest import rate_model, simulate_rates, summarize, synthetic_utilization
+
+    model = rate_model(_load_json(args.config)["asset_parameters"])
+    if args.rate_half_life:
+        model = model._replace(rate_half_life=np.full(len(model.assets), float(args.rate_half_life)))
+    if args.utilization:
+        read = pd.read_csv if args.utilization.endswith('.csv') else pd.read_parquet
+        utilization = read(args.utilization)
+        if args.utilization.endswith('.csv'):
+            utilization = utilization.set_index(utilization.columns[0])
+            utilization.index = pd.to_datetime(utilization.index)
+        result = simulate_rates(model, utilization, dt=args.dt)
+    else:
+        utilization = synthetic_utilization(args.steps, model.target_utilization, dt=args.dt or 60, volatility=args.volatility,
+                                            max_utilization=model.max_utilization, seed=args.seed)
+        result = simulate_rates(model, utilization, dt=args.dt or 60, record_every=max(args.steps // 1000, 1))
+    summary = summarize(model, result)
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 200):
+        print(summary)
+    if args.out:
+        summary.to_csv(args.out)
+        print(f'Wrote {args.out}')
+    return 0
+
+
+def cmd_diff(args):
+    from .diff import diff_dirs, diff_files, diff_git, format_changes, to_records
+
+    tolerance = {'rel_tol': args.rel_tol, 'abs_tol': args.abs_tol}
+    if args.rev:
+        changes = diff_git(args.paths, args.rev, **tolerance)
+    elif len(args.paths) != 2:
+        print('diff needs exactly two files or directories, or --rev')
+        return 2
+    elif all(os.path.isdir(path) for path in args.paths):
+        changes = diff_dirs(*args.paths, **tolerance)
+    else:
+        changes = diff_files(*args.paths, **tolerance)
+
+    if args.json:
+        with open(args.json, 'w') as outfile:
+            json.dump(to_records(changes), outfile, indent=2)
+    print(format_changes(changes))
+    return 1 if changes else 0
+
+
+def cmd_validate(args):
+    from .validate import format_violations, validate_files
+
+    paths = args.configs or sorted(glob.glob(os.path.join(args.root, 'configurations', 'config_*.json')))
+    violations = validate_files(paths)
+    if violations:
+        print(format_violations(violations))
+    print(f'{len(paths)} configurations, {len(violations)} violations')
+    return 1 if violations else 0
+
+
+def cmd_lookup(args):
+    from .registry import Registry
+
+    registry = Registry.load(args.root)
+    if args.network:
+        registry = registry.network(args.network)
+    missing = 0
+    for key in args.keys:
+        found = registry.resolve(key)
+        missing += not found
+        print(f'{key}: {len(found) or "nothing"} found')
+        for record in found:
+            print(f'  {type(record).__name__} {json.dumps(record._asdict(), default=str)}')
+    return 1 if missing else 0
+
+
+def cmd_bench(args):
+    from .benchmark import compare, format_results, run_suite, write_results
+
+    suite = run_suite(args.assets, args.days, args.repeat, memory=not args.no_memory, seed=args.seed)
+    print(format_results(suite))
+    if args.out:
+        write_results(suite, args.out)
+        print(f'Wrote {args.out}')
+    if args.compare:
+        regressions = compare(_load_json(args.compare), suite, args.threshold)
+        for assets, stage, before, after in regressions:
+            print(f'regression: {stage} with {assets} assets took {after:.4f}s (baseline {before:.4f}s)')
+        return 1 if regressions else 0
+    return 0
+
+
+def _load_json(path):
+    with open(path) as infile:
+        return json.load(infile)
+
+
+def _add_fetch_options(parser):
+    parser.add_argument('--cache-dir', default='.price_cache', help='price cache directory (default: %(default)s)')
+    parser.add_argument('--api-key-env', default='CG_KEY', help='environment variable holding the CoinGecko pro API key (default: %(default)s)')
+    parser.add_argument('--url', help='CoinGecko API base url, e.g. of a local mock server')
+    parser.add_argument('--concurrency', type=int, default=8, help='max requests in flight (default: %(default)s)')
+    parser.add_argument('--rate-limit', type=int, default=250, help='max requests per minute (default: %(default)s)')
+
+
+def _add_registry_options(parser):
+    from .registry import DEFAULT_ROOT
+    parser.add_argument('--root', default=DEFAULT_ROOT, help='repository with the pool listings and deployments (default: %(default)s)')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='vesu-config', description='Derive and manage Vesu pool configurations.')
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+
+    generate = commands.add_parser('generate', help='generate pool configurations from pool specs')
+    generate.add_argument('specs', nargs='+', help='pool spec JSON files')
+    generate.add_argument('--out-dir', default='.', help='output directory (default: %(default)s)')
+    generate.add_argument('--start-date', help='first day of the price window')
+    generate.add_argument('--end-date', help='last day of the price window')
+    generate.add_argument('--liquidity', help='JSON file with liquidity rows shared by all specs')
+    generate.add_argument('--workers', type=int, help='worker processes for the per-pool stages')
+    generate.add_argument('--report', help='write a per-stage run report (wall/CPU time, peak RSS, counts) to this JSON file')
+    generate.add_argument('--profile', action='store_true', help='add cProfile and tracemalloc captures to the run report')
+    generate.add_argument('--float32', action='store_true', help='keep prices and returns in single precision')
+    generate.add_argument('--memo-file', default='.vesu_memo.sqlite', help='cache of stage results reused across runs (default: %(default)s)')
+    generate.add_argument('--memo-max-mb', type=int, default=256, help='size limit of the stage cache (default: %(default)s)')
+    generate.add_argument('--no-memo', action='store_true', help='recompute every stage')
+    _add_fetch_options(generate)
+    generate.set_defaults(handler=cmd_generate)
+
+    fetch = commands.add_parser('fetch', help='fetch daily prices into a Parquet file')
+    fetch.add_argument('coins', nargs='+', help='CoinGecko ids')
+    fetch.add_argument('--out', default='prices.parquet', help='output file (default: %(default)s)')
+    _add_fetch_options(fetch)
+    fetch.set_defaults(handler=cmd_fetch)
+
+    check = commands.add_parser('check', help='check the structure of pool specs')
+    check.add_argument('specs', nargs='+', help='pool spec JSON files')
+    check.add_argument('--registry', action='store_true', help='also check the tokens against the asset registry')
+    _add_registry_options(check)
+    check.set_defaults(handler=cmd_check)
+
+    watch = commands.add_parser('watch', help='regenerate pool configurations as new prices or liquidity arrive')
+    watch.add_argument('specs', nargs='+', help='pool spec JSON files')
+    watch.add_argument('--drop-dir', default='drop', help='directory polled for *.prices.json and *.liquidity.json (default: %(default)s)')
+    watch.add_argument('--out-dir', default='.', help='output directory (default: %(default)s)')
+    watch.add_argument('--start-date', help='first day of the price window')
+    watch.add_argument('--liquidity', help='JSON file with liquidity rows shared by all specs')
+    watch.add_argument('--threshold', type=float, default=0.01, help='max_ltv move that triggers a new configuration (default: %(default)s)')
+    watch.add_argument('--window', type=int, help='rolling volatility window in days (default: whole history)')
+    watch.add_argument('--poll', type=float, default=10, help='seconds between polls of the drop directory (default: %(default)s)')
+    watch.add_argument('--interval', type=float, help='seconds between scheduled price fetches (default: no fetches)')
+    _add_fetch_options(watch)
+    watch.set_defaults(handler=cmd_watch)
+
+    backtest = commands.add_parser('backtest', help='backtest the Max LTVs of configurations against a price history')
+    backtest.add_argument('configs', nargs='+', help='pool configuration files')
+    backtest.add_argument('--prices', required=True, help='Parquet price history, e.g. from `vesu-config fetch`')
+    backtest.add_argument('--start-date', help='first day of the price window')
+    backtest.add_argument('--end-date', help='last day of the price window')
+    backtest.add_argument('--horizons', type=int, nargs='+', default=[1, 3, 7], help='holding horizons in days (default: %(default)s)')
+    backtest.add_argument('--out', help='write all results to this CSV file')
+    backtest.set_defaults(handler=cmd_backtest)
+
+    stress = commands.add_parser('stress', help='apply price shock scenarios to all pairs of the configurations')
+    stress.add_argument('configs', nargs='*', help='configuration files (default: all configurations/config_*.json)')
+    stress.add_argument('--scenarios', help='JSON file of {name: {CoinGecko id: shock}}')
+    stress.add_argument('--shock', nargs='+', metavar='ASSET=SHOCK', help='one scenario, e.g. starknet=-0.4 ethereum=-0.25')
+    stress.add_argument('--utilization', type=float, default=1.0, help='positions are opened at this fraction of max_ltv (default: %(default)s)')
+    stress.add_argument('--out', help='write the summary to this CSV file')
+    _add_registry_options(stress)
+    stress.set_defaults(handler=cmd_stress)
+
+    rates = commands.add_parser('rates', help='simulate the adaptive interest rate model over utilization paths')
+    rates.add_argument('config', help='pool configuration or spec file')
+    rates.add_argument('--utilization', help='CSV or Parquet file with one column per asset and a time index (default: synthetic paths)')
+    rates.add_argument('--dt', type=float, help='seconds per step (default: from the time index, 60 for synthetic paths)')
+    rates.add_argument('--steps', type=int, default=1000000, help='steps of the synthetic paths (default: %(default)s)')
+    rates.add_argument('--volatility', type=float, default=0.5, help='standard deviation of the synthetic logit utilization (default: %(default)s)')
+    rates.add_argument('--seed', type=int, default=0)
+    rates.add_argument('--rate-half-life', type=int, help='override the rate_half_life of all assets, in seconds')
+    rates.add_argument('--out', help='write the summary to this CSV file')
+    rates.set_defaults(handler=cmd_rates)
+
+    diff = commands.add_parser('diff', help='structural diff of pool configurations; exits with 1 on changes')
+    diff.add_argument('paths', nargs='+', help='OLD NEW files or directories, or the files to compare against --rev')
+    diff.add_argument('--rev', help='compare the files against their version at this git revision')
+    diff.add_argument('--rel-tol', type=float, default=1e-9, help='relative tolerance of numeric values (default: %(default)s)')
+    diff.add_argument('--abs-tol', type=float, default=0, help='absolute tolerance of numeric values (default: %(default)s)')
+    diff.add_argument('--json', help='also write the changes to this JSON file')
+    diff.set_defaults(handler=cmd_diff)
+
+    validate = commands.add_parser('validate', help='check pool configurations against the schema and invariants')
+    validate.add_argument('configs', nargs='*', help='configuration files (default: all configurations/config_*.json)')
+    _add_registry_options(validate)
+    validate.set_defaults(handler=cmd_validate)
+
+    lookup = commands.add_parser('lookup', help='resolve symbols, CoinGecko ids, addresses, vTokens and pool ids')
+    lookup.add_argument('keys', nargs='+')
+    lookup.add_argument('--network', help='only look up on this network (mainnet or sepolia)')
+    _add_registry_options(lookup)
+    lookup.set_defaults(handler=cmd_lookup)
+
+    bench = commands.add_parser('bench', help='benchmark the pipeline stages on synthetic asset universes')
+    bench.add_argument('--assets', type=int, nargs='+', default=[6, 50, 200], help='universe sizes (default: %(default)s)')
+    bench.add_argument('--days', type=int, default=1000, help='days of price history (default: %(default)s)')
+    bench.add_argument('--repeat', type=int, default=3, help='timed runs per stage (default: %(default)s)')
+    bench.add_argument('--seed', type=int, default=0)
+    bench.add_argument('--no-memory', action='store_true', help='skip the tracemalloc peak memory runs')
+    bench.add_argument('--out', help='write the results to this JSON file')
+    bench.add_argument('--compare', help='baseline results JSON; exit with 1 on regressions')
+    bench.add_argument('--threshold', type=float, default=0.2, help='relative slowdown counted as regression (default: %(default)s)')
+    bench.set_defaults(handler=cmd_bench)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
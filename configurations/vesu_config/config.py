@@ -0,0 +1,109 @@
+"""
+Pool configuration assembly.
+
+Converts the asset rate parameters to per-second rates, rounded exactly to the 1e18 fixed-point representation of the contracts, adds
+the asset addresses to the pair parameters and writes the combined pool configuration file.
+"""
+
+import json
+from decimal import ROUND_HALF_EVEN, Decimal, localcontext
+
+import numpy as np
+
+SECONDS_PER_YEAR = 31104000 # 360 days
+SCALE = 10 ** 18            # rates are 1e18 fixed-point numbers on-chain
+
+RATE_FIELDS = [
+    "min_full_utilization_rate",
+    "max_full_utilization_rate",
+    "initial_full_utilization_rate",
+    "zero_utilization_rate"
+]
+
+# scaled rates closer than this to a rounding tie, or beyond exact float64 integers, are recomputed with Decimal
+TIE_TOLERANCE = 1e-4
+MAX_EXACT = 2 ** 53
+
+
+def exact_per_second(per_annum_rate):
+    """Per-second rate of a per-annum rate as 1e18 scaled integer, computed with 60 digit `Decimal`s and rounded half to even."""
+    with localcontext() as ctx:
+        ctx.prec = 60
+        per_second = ((1 + Decimal(str(per_annum_rate))).ln() / SECONDS_PER_YEAR).exp() - 1
+        return int((per_second * SCALE).to_integral_value(ROUND_HALF_EVEN))
+
+
+def per_second_scaled(per_annum_rates, verify=False):
+    """
+    Per-second rates of an array of per-annum rates as 1e18 scaled integers (int64), correctly rounded.
+
+    The rates are computed as expm1(log1p(r) / SECONDS_PER_YEAR), which avoids the cancellation of (1 + r)**(1 / SECONDS_PER_YEAR) - 1
+    and leaves an error of about 1e-6 of the last fixed-point digit. Only values that land within `TIE_TOLERANCE` of a rounding tie are
+    recomputed with `Decimal`. With `verify`, every value is checked against `exact_per_second`.
+    """
+    rates = np.asarray(per_annum_rates, dtype=float)
+    if np.any(rates <= -1) or not np.all(np.isfinite(rates)):
+        raise ValueError('per-annum rates must be finite and greater than -1')
+    scaled = np.expm1(np.log1p(rates) / SECONDS_PER_YEAR) * SCALE
+    result = np.rint(scaled).astype(np.int64)
+    unsure = (np.abs(scaled - np.floor(scaled) - 0.5) < TIE_TOLERANCE) | (np.abs(scaled) >= MAX_EXACT)
+    for i in zip(*np.nonzero(unsure)):
+        result[i] = exact_per_second(rates[i])
+    if verify:
+        exact = np.array([exact_per_second(r) for r in rates.ravel()], dtype=np.int64).reshape(rates.shape)
+        mismatch = np.flatnonzero(exact != result)
+        if len(mismatch):
+            raise ArithmeticError(f'fixed-point rates differ from the exact values at {mismatch.tolist()}')
+    return result
+
+
+def format_scaled(scaled):
+    """Decimal string with 18 places of a 1e18 scaled integer."""
+    sign = '-' if scaled < 0 else ''
+    whole, fraction = divmod(abs(int(scaled)), SCALE)
+    return f'{sign}{whole}.{fraction:018d}'
+
+
+# Convert per-annum to per-second interest rates
+# Note we format as a decimal string as otherwise python writes in scientific
+def to_per_second(per_annum_rate):
+    return format_scaled(per_second_scaled([per_annum_rate])[0])
+
+
+def convert_rates(asset_parameters, verify=False):
+    """
+    Replace the per-annum rate fields of every asset with per-second decimal strings (in place), converting all fields of all assets in
+    one vectorized pass. Returns the 1e18 scaled integers as an (assets x RATE_FIELDS) array.
+
+    The configurations only hold the strings: with exactly 18 places they are the scaled integers with a decimal point inserted, so
+    `int(rate.replace('.', ''))` recovers the on-chain value without rounding.
+    """
+    scaled = per_second_scaled([[a[field] for field in RATE_FIELDS] for a in asset_parameters], verify=verify)
+    scaled = scaled.reshape(len(asset_parameters), len(RATE_FIELDS))
+    for a, row in zip(asset_parameters, scaled.tolist()):
+        for field, value in zip(RATE_FIELDS, row):
+            a[field] = format_scaled(value)
+    return scaled
+
+
+def add_addresses(pair_parameters, asset_parameters):
+    """Add the debt and collateral token addresses to every pair (in place)."""
+    addresses = {a["asset_name"]: a["token"]["address"] for a in asset_parameters}
+    for p in pair_parameters:
+        p["debt_asset"] = addresses[p["debt_asset_name"]]
+        p["collateral_asset"] = addresses[p["collateral_asset_name"]]
+
+
+def build_config(pool_parameters, asset_parameters, pair_parameters):
+    """Combine the parameter sets into a single pool configuration."""
+    return {
+        "asset_parameters": asset_parameters,
+        "pair_parameters": pair_parameters,
+        "pool_parameters": pool_parameters
+    }
+
+
+def write_config(parameters, path):
+    """Convert and write the pool configuration to a JSON file."""
+    with open(path, "w") as outfile:
+        json.dump(parameters, outfile, indent=2)
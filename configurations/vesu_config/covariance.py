@@ -0,0 +1,156 @@
+"""
+Asset covariance and correlation engine.
+
+The worst-case volatility of the Smart LTV looks at every pair on its own. This module measures how assets move together, from the
+per-asset (T x n) log return matrix:
+
+- `covariance(returns, kind)` builds the full covariance and correlation matrices, either plain (equal weights), EWMA (exponentially
+  decaying weights) or downside (co-semideviations of the negative returns). Assets listed later have NaN returns before their listing;
+  every pair of assets uses the days on which both have returns (pairwise complete, like pandas' `DataFrame.cov`). All weighted sums
+  of all pairs come out of a single BLAS product `Z.T @ Z` of the stacked matrix Z = [X, X², M] (returns, squared returns, mask).
+- `pool_risk(pools, returns)` summarizes every pool: average (downside) correlation of its assets, the diversification ratio of an
+  equally weighted basket (w'σ / σ_basket, 1 for perfectly correlated assets and higher the more diversified the pool) and
+  joint-drawdown statistics, i.e. how often and how badly its assets crash on the same day.
+"""
+
+import warnings
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+KINDS = ("plain", "ewma", "downside")
+
+Covariance = namedtuple('Covariance', 'columns cov corr counts')
+
+
+def _comoments(values, weights):
+    # pairwise complete weighted sums from one product of Z = sqrt(w) * [X, X², M]
+    n = values.shape[1]
+    mask = ~np.isnan(values)
+    x = np.where(mask, values, 0.0)
+    z = np.concatenate([x, x * x, mask.astype(float)], axis=1)
+    if weights is not None:
+        z *= np.sqrt(weights)[:, None]
+    product = z.T @ z
+    sxy = product[:n, :n]           # sum of x_i x_j on joint days
+    sx = product[:n, 2 * n:]        # sum of x_i on days where j is also valid
+    sxx = product[n:2 * n, 2 * n:]  # sum of x_i² on days where j is also valid
+    w = product[2 * n:, 2 * n:]     # total weight of the joint days
+    if weights is None:
+        counts = np.rint(w).astype(np.int64)
+    else:
+        m = mask.astype(float)
+        counts = np.rint(m.T @ m).astype(np.int64)
+    return sxy, sx, sxx, w, counts
+
+
+def ewma_weights(T, halflife):
+    """Weights of T days decaying by half every `halflife` days, the most recent day weighing 1."""
+    return 0.5 ** (np.arange(T)[::-1] / halflife)
+
+
+def covariance(returns, kind="plain", halflife=30, min_periods=30):
+    """
+    Covariance and correlation of all assets of `returns` (a DataFrame or `PriceMatrix` of log returns).
+
+    `kind` is "plain", "ewma" (weights halve every `halflife` days) or "downside" (co-semideviation below zero). Pairs with fewer than
+    `min_periods` joint days are NaN. Returns a `Covariance` of (columns, cov, corr, counts) arrays.
+    """
+    if kind not in KINDS:
+        raise ValueError(f'Unknown kind {kind}, expected one of {KINDS}')
+    values = np.asarray(returns.to_numpy(), dtype=float)
+    weights = ewma_weights(len(values), halflife) if kind == "ewma" else None
+    if kind == "downside":
+        values = np.minimum(values, 0.0)
+
+    sxy, sx, sxx, w, counts = _comoments(values, weights)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if kind == "downside":
+            # semideviations around zero, not around the mean
+            cov = sxy / w
+            var_i, var_j = sxx / w, sxx.T / w
+        else:
+            mean_i, mean_j = sx / w, sx.T / w
+            cov = sxy / w - mean_i * mean_j
+            var_i, var_j = sxx / w - mean_i ** 2, sxx.T / w - mean_j ** 2
+            if weights is None:
+                # sample (n - 1) normalization
+                cov *= counts / (counts - 1)
+                var_i, var_j = var_i * counts / (counts - 1), var_j * counts / (counts - 1)
+        corr = cov / np.sqrt(var_i * var_j)
+    few = counts < min_periods
+    cov[few] = np.nan
+    corr[few] = np.nan
+    np.fill_diagonal(corr, np.where(np.diag(few), np.nan, 1.0))
+    return Covariance(list(returns.columns), cov, np.clip(corr, -1, 1), counts)
+
+
+def to_frame(matrix, columns):
+    """Label a (n x n) matrix with the asset names."""
+    return pd.DataFrame(matrix, index=columns, columns=columns)
+
+
+def _mean_off_diagonal(matrix):
+    n = len(matrix)
+    if n < 2:
+        return np.nan
+    off = matrix[~np.eye(n, dtype=bool)]
+    return np.nanmean(off) if np.any(~np.isnan(off)) else np.nan
+
+
+def pool_assets(pool):
+    """CoinGecko ids of the assets of a pool spec or configuration."""
+    return list(dict.fromkeys(a["asset_name"] for a in pool["asset_parameters"]))
+
+
+def pool_risk(pools, returns, threshold=0.05, min_assets=2, halflife=30, min_periods=30):
+    """
+    Co-movement statistics of every pool, given as {name: spec or configuration} or a list of specs with an "output" key.
+
+    A joint drawdown is a day on which at least `min_assets` assets of the pool fall by more than `threshold` (log return). The
+    covariance matrices are computed once for all assets. Returns a DataFrame with one row per pool.
+    """
+    if not isinstance(pools, dict):
+        pools = {pool["output"]: pool for pool in pools}
+    columns = list(returns.columns)
+    position = {name: i for i, name in enumerate(columns)}
+    values = np.asarray(returns.to_numpy(), dtype=float)
+    plain = covariance(returns, "plain", min_periods=min_periods)
+    ewma = covariance(returns, "ewma", halflife=halflife, min_periods=min_periods)
+    downside = covariance(returns, "downside", min_periods=min_periods)
+    falls = values < -threshold
+
+    rows = {}
+    for name, pool in pools.items():
+        assets = pool_assets(pool)
+        missing = [a for a in assets if a not in position]
+        if missing:
+            raise KeyError(f'No returns for {", ".join(missing)} of pool {name}')
+        idx = np.array([position[a] for a in assets], dtype=np.intp)
+        block = np.ix_(idx, idx)
+
+        # equally weighted basket of the pool's assets
+        sigma = np.sqrt(np.diag(plain.cov)[idx])
+        weights = np.full(len(idx), 1 / len(idx))
+        with warnings.catch_warnings():
+            # days before any of the pool's assets was listed yield NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            basket = np.nanmean(values[:, idx], axis=1)
+        concurrent = falls[:, idx].sum(axis=1)
+        joint = concurrent >= min_assets
+        worst = int(np.nanargmin(basket)) if np.any(~np.isnan(basket)) else None
+
+        rows[name] = {
+            "assets": len(idx),
+            "mean_correlation": _mean_off_diagonal(plain.corr[block]),
+            "mean_ewma_correlation": _mean_off_diagonal(ewma.corr[block]),
+            "mean_downside_correlation": _mean_off_diagonal(downside.corr[block]),
+            "diversification_ratio": float((weights @ sigma) / np.sqrt(weights @ plain.cov[block] @ weights)),
+            "joint_drawdown_days": int(joint.sum()),
+            "joint_drawdown_frequency": float(joint.mean()) if len(joint) else np.nan,
+            "max_concurrent_drawdowns": int(concurrent.max()) if len(concurrent) else 0,
+            "worst_basket_return": float(basket[worst]) if worst is not None else np.nan,
+            "worst_basket_day": returns.index[worst] if worst is not None else None
+        }
+    return pd.DataFrame.from_dict(rows, orient='index')
@@ -0,0 +1,179 @@
+"""
+Structural diff of pool configurations.
+
+Assets are matched by token address and pairs by their (collateral, debt) token addresses, so reordering entries or renaming a CoinGecko
+id does not show up as a change. Nested fields are compared leaf by leaf. Numbers and decimal-string rates are compared as `Decimal`s with
+a tolerance, so "0.100000000000000000" and 0.1 are equal. Every file is diffed with dict lookups, linear in the size of the configs.
+
+    changes = diff_files('config_genesis_sn_main.json', 'out/config_genesis_sn_main.json')
+    print(format_changes(changes))
+
+Like `vesu_config.spec`, this module only depends on the standard library.
+"""
+
+import json
+import subprocess
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from .registry import normalize_address
+
+SECTIONS = ["pool_parameters", "asset_parameters", "pair_parameters"]
+
+Change = namedtuple('Change', 'file section entry field kind old new')
+
+
+def _flatten(value, prefix=''):
+    # leaves of nested dicts keyed by dotted path
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(_flatten(item, f'{prefix}{key}.'))
+        return flat
+    return {prefix[:-1]: value}
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, str)):
+        try:
+            number = Decimal(str(value))
+        except InvalidOperation:
+            return None
+        return number if number.is_finite() else None
+    return None
+
+
+def _equal(old, new, rel_tol, abs_tol):
+    if old == new:
+        return True
+    a, b = _number(old), _number(new)
+    if a is None or b is None:
+        return False
+    return abs(a - b) <= max(Decimal(str(abs_tol)), Decimal(str(rel_tol)) * max(abs(a), abs(b)))
+
+
+def _address(value):
+    try:
+        return normalize_address(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _asset_entries(assets):
+    entries = {}
+    for a in assets:
+        address = a.get("token", {}).get("address")
+        key = _address(address) if address else a.get("asset_name")
+        entries[key] = (a.get("token", {}).get("symbol") or a.get("asset_name") or key, a)
+    return entries
+
+
+def _pair_entries(pairs, labels):
+    entries = {}
+    for p in pairs:
+        if "collateral_asset" in p and "debt_asset" in p:
+            key = (_address(p["collateral_asset"]), _address(p["debt_asset"]))
+            label = f'{labels.get(key[0], p["collateral_asset_name"])}/{labels.get(key[1], p["debt_asset_name"])}'
+        else:
+            key = (p["collateral_asset_name"], p["debt_asset_name"])
+            label = f'{key[0]}/{key[1]}'
+        entries[key] = (label, p)
+    return entries
+
+
+def _diff_entries(file, section, old, new, rel_tol, abs_tol):
+    changes = []
+    for key, (label, entry) in old.items():
+        if key not in new:
+            changes.append(Change(file, section, label, None, 'removed', entry, None))
+            continue
+        old_fields, new_fields = _flatten(entry), _flatten(new[key][1])
+        for field, value in old_fields.items():
+            if field not in new_fields:
+                changes.append(Change(file, section, label, field, 'removed', value, None))
+            elif not _equal(value, new_fields[field], rel_tol, abs_tol):
+                changes.append(Change(file, section, label, field, 'changed', value, new_fields[field]))
+        changes += [Change(file, section, label, field, 'added', None, value) for field, value in new_fields.items() if field not in old_fields]
+    changes += [Change(file, section, label, None, 'added', None, entry) for key, (label, entry) in new.items() if key not in old]
+    return changes
+
+
+def diff_configs(old, new, file=None, rel_tol=1e-9, abs_tol=0):
+    """Changes between two loaded pool configurations; `file` labels the changes."""
+    old_assets, new_assets = _asset_entries(old.get("asset_parameters", [])), _asset_entries(new.get("asset_parameters", []))
+    labels = {key: label for entries in (old_assets, new_assets) for key, (label, _) in entries.items()}
+    return (
+        _diff_entries(file, "pool_parameters", {"pool": ("pool", old.get("pool_parameters", {}))},
+                      {"pool": ("pool", new.get("pool_parameters", {}))}, rel_tol, abs_tol)
+        + _diff_entries(file, "asset_parameters", old_assets, new_assets, rel_tol, abs_tol)
+        + _diff_entries(file, "pair_parameters", _pair_entries(old.get("pair_parameters", []), labels),
+                        _pair_entries(new.get("pair_parameters", []), labels), rel_tol, abs_tol)
+    )
+
+
+def _load(path):
+    with open(path) as infile:
+        return json.load(infile)
+
+
+def diff_files(old_path, new_path, **kwargs):
+    """Changes between two configuration files."""
+    return diff_configs(_load(old_path), _load(new_path), file=Path(new_path).name, **kwargs)
+
+
+def diff_dirs(old_dir, new_dir, pattern='config_*.json', **kwargs):
+    """Changes between all configuration files of two directories, matched by file name. Files in only one directory are reported whole."""
+    old_files = {p.name: p for p in Path(old_dir).glob(pattern)}
+    new_files = {p.name: p for p in Path(new_dir).glob(pattern)}
+    changes = []
+    for name in sorted(old_files.keys() | new_files.keys()):
+        if name not in new_files:
+            changes.append(Change(name, None, None, None, 'removed', str(old_files[name]), None))
+        elif name not in old_files:
+            changes.append(Change(name, None, None, None, 'added', None, str(new_files[name])))
+        else:
+            changes += diff_configs(_load(old_files[name]), _load(new_files[name]), file=name, **kwargs)
+    return changes
+
+
+def diff_git(paths, rev='HEAD', **kwargs):
+    """Changes of the configuration files at `paths` against their committed version at `rev`."""
+    changes = []
+    for path in map(Path, paths):
+        shown = subprocess.run(['git', 'show', f'{rev}:./{path.name}'], cwd=path.parent, capture_output=True, text=True)
+        if shown.returncode != 0:
+            changes.append(Change(path.name, None, None, None, 'added', None, str(path)))
+            continue
+        changes += diff_configs(json.loads(shown.stdout), _load(path), file=path.name, **kwargs)
+    return changes
+
+
+def to_records(changes):
+    """Changes as a list of dicts, for JSON output."""
+    return [change._asdict() for change in changes]
+
+
+def format_changes(changes):
+    """Human readable report grouped by file and entry."""
+    if not changes:
+        return 'no changes'
+    lines, current = [], None
+    symbols = {'changed': '~', 'added': '+', 'removed': '-'}
+    for c in changes:
+        if c.file != current:
+            current = c.file
+            lines.append(f'{c.file}:')
+        if c.section is None:
+            lines.append(f'  {symbols[c.kind]} file {c.kind}')
+        elif c.field is None:
+            lines.append(f'  {symbols[c.kind]} {c.section} {c.entry} {c.kind}')
+        elif c.kind == 'changed':
+            lines.append(f'  {symbols[c.kind]} {c.section} {c.entry} {c.field}: {c.old} -> {c.new}')
+        else:
+            lines.append(f'  {symbols[c.kind]} {c.section} {c.entry} {c.field}: {c.new if c.kind == "added" else c.old}')
+    counts = {kind: sum(c.kind == kind for c in changes) for kind in symbols}
+    lines.append(', '.join(f'{n} {kind}' for kind, n in counts.items()))
+    return '\n'.join(lines)
@@ -0,0 +1,161 @@
+"""
+Price fetch stage.
+
+Daily prices are fetched from the CoinGecko `market_chart` endpoint. Requests are issued from a thread pool with a bounded number of
+requests in flight, paced by a token bucket so that the pro-API quota is never exceeded, and retried with exponential backoff on
+rate-limit (429) and server (5xx) errors. A coin that still cannot be fetched after all retries raises a `FetchError`. Progress is
+reported through the `vesu_config.fetch` logger.
+
+When a `PriceCache` is supplied, only the days after the last cached date are requested. Cached prices are kept per API url and query
+parameters, so data of a mock server or of other parameters is never reused for live requests.
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+# static params
+CG_PRO_URL = 'https://pro-api.coingecko.com/api/v3/' # CG pro endpoint
+CURRENCY = 'usd'                                      # denote prices in USD
+DAYS = 'max'                                          # max price history
+INTERVAL = 'daily'                                    # daily prices
+
+RETRY_STATUS = {429, 500, 502, 503, 504}              # transient errors worth retrying
+
+logger = logging.getLogger(__name__)
+
+
+class FetchError(RuntimeError):
+    """Raised when the price history of a coin cannot be retrieved."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens are refilled continuously at `rate` tokens per second up to `capacity`. `acquire` blocks until a token is available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _backoff(attempt, base, cap, retry_after=None):
+    # honour the server's Retry-After header if present, otherwise use full-jitter exponential backoff
+    if retry_after is not None:
+        try:
+            return min(cap, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def to_frame(coin, data):
+    """Convert a `market_chart` response into a date indexed single column DataFrame."""
+    df = pd.DataFrame(data['prices'], columns=['date', coin])
+    df['date'] = pd.to_datetime(df['date'], unit='ms')
+    df.set_index('date', drop=True, inplace=True)
+    return df
+
+
+def fetch_prices(coin, api_key=None, url=CG_PRO_URL, session=None, limiter=None, params=None, retries=5,
+                 backoff_base=1.0, backoff_cap=60.0, timeout=30):
+    """
+    Fetch the daily USD price history of `coin` and return it as a DataFrame.
+
+    `params` overrides the default query parameters (e.g. `days`). Transient errors are retried up to `retries` times.
+    """
+    session = session or requests.Session()
+    request = f'coins/{coin}/market_chart'
+    query = {
+        'vs_currency': CURRENCY,
+        'days': DAYS,
+        'interval': INTERVAL
+    }
+    if api_key:
+        query['x_cg_pro_api_key'] = api_key
+    query.update(params or {})
+
+    error = None
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        retry_after = None
+        try:
+            response = session.get(url + request, params=query, timeout=timeout)
+        except requests.RequestException as e:
+            error = f'{type(e).__name__}: {e}'
+        else:
+            if response.status_code == 200:
+                return to_frame(coin, response.json())
+            error = f'HTTP {response.status_code}'
+            if response.status_code not in RETRY_STATUS:
+                break
+            retry_after = response.headers.get('Retry-After')
+        if attempt < retries:
+            time.sleep(_backoff(attempt, backoff_base, backoff_cap, retry_after))
+
+    raise FetchError(f'Failed to retrieve data for {coin} ({error})')
+
+
+def fetch_all_prices(coins, api_key=None, url=CG_PRO_URL, concurrency=8, rate_limit=250, params=None, cache=None, dtype=None, **kwargs):
+    """
+    Fetch the price histories of `coins` concurrently and return them joined into one DataFrame (one column per coin), or with a
+    `dtype` into a compact `vesu_config.store.PriceMatrix` of that dtype.
+
+    At most `concurrency` requests are in flight and at most `rate_limit` requests are issued per minute. Any coin that fails
+    after all retries raises a `FetchError`. With a `cache`, coins that are up to date are not requested at all and the others only
+    request their missing tail. An empty list of `coins` raises a `ValueError`.
+    """
+    coins = list(coins)
+    if not coins:
+        raise ValueError('No coins to fetch')
+    if cache is not None:
+        cache = cache.source(url, params)
+    limiter = TokenBucket(rate_limit / 60, capacity=min(concurrency, rate_limit))
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    def fetch(coin):
+        query = dict(params or {})
+        if cache is not None:
+            missing = cache.missing_days(coin)
+            if missing == 0:
+                logger.info('Using cached data for %s', coin)
+                return cache.load(coin)
+            if missing is not None:
+                query['days'] = missing
+        df = fetch_prices(coin, api_key, url=url, session=session, limiter=limiter, params=query, **kwargs)
+        logger.info('Successfully retrieved data for %s', coin)
+        return df if cache is None else cache.update(coin, df)
+
+    with session, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        data = list(pool.map(fetch, coins))
+
+    if dtype is not None:
+        from .store import PriceMatrix
+        return PriceMatrix.from_series({coin: df[coin] for coin, df in zip(coins, data)}, dtype=dtype)
+    return data[0].join(data[1:], how='outer') if len(data) > 1 else data[0]
@@ -0,0 +1,221 @@
+"""
+Adaptive interest rate model simulator.
+
+Replays the rate controller of the Vesu interest rate model over utilization paths, for all assets at once. Every step holds the
+utilization `u` for `dt` seconds. The full utilization rate adapts to it:
+
+- below `min_target_utilization` it decays:  full' = full * half_life / (half_life + ((min_target - u) / min_target)^2 * dt)
+- above `max_target_utilization` it grows:   full' = full * (half_life + ((u - max_target) / (1 - max_target))^2 * dt) / half_life
+- in between it stays, and it is always clamped to [min_full_utilization_rate, max_full_utilization_rate].
+
+The interest rate is piecewise linear in the utilization, from `zero_utilization_rate` at 0 over the target rate
+(zero + target_rate_percent * (full' - zero)) at `target_utilization` to full' at 1. Debt compounds continuously at that rate.
+
+The full rate is a clamped recurrence, x_t = clip(x_{t-1} + a_t, lo, hi) in log space. Clamped shifts compose into clamped shifts, so all
+steps are evaluated with a parallel prefix scan of (shift, lower, upper) triples over (chunk x assets) arrays in log2(chunk) NumPy passes
+instead of a Python loop per step. Rates are float64; the fixed-point rounding of the contract is not modelled.
+
+    model = rate_model(config["asset_parameters"])
+    result = simulate_rates(model, synthetic_utilization(1_000_000, model.target_utilization, dt=60), dt=60)
+    print(summarize(model, result))
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .config import SECONDS_PER_YEAR
+
+# log full rates within this distance of a bound count as sitting at the bound (the scan composes bounds with float additions)
+BOUND_TOLERANCE = 1e-9
+
+RateModel = namedtuple('RateModel', 'assets target_utilization min_target_utilization max_target_utilization max_utilization '
+                                    'zero_utilization_rate min_full_utilization_rate max_full_utilization_rate '
+                                    'initial_full_utilization_rate rate_half_life target_rate_percent')
+RateSimulation = namedtuple('RateSimulation', 'steps seconds full_utilization_rate rate accumulator final_full_utilization_rate '
+                                              'mean_rate min_rate max_rate at_min at_max')
+
+
+def _per_second(value):
+    # configurations hold per-second rates as decimal strings, specs per-annum rates as numbers
+    if isinstance(value, str):
+        return float(value)
+    return float(np.expm1(np.log1p(value) / SECONDS_PER_YEAR))
+
+
+def per_annum(per_second_rate):
+    """Per-annum rate of a per-second rate (array), the inverse of the conversion in `vesu_config.config`."""
+    return np.expm1(np.log1p(per_second_rate) * SECONDS_PER_YEAR)
+
+
+def rate_model(asset_parameters):
+    """Rate model parameters of every asset as arrays, with per-second rates, from a spec's or a configuration's `asset_parameters`."""
+    def column(field, convert=float):
+        return np.array([convert(a[field]) for a in asset_parameters], dtype=float)
+
+    return RateModel(
+        [a["asset_name"] for a in asset_parameters],
+        column("target_utilization"),
+        column("min_target_utilization"),
+        column("max_target_utilization"),
+        column("max_utilization"),
+        column("zero_utilization_rate", _per_second),
+        column("min_full_utilization_rate", _per_second),
+        column("max_full_utilization_rate", _per_second),
+        column("initial_full_utilization_rate", _per_second),
+        column("rate_half_life"),
+        column("target_rate_percent")
+    )
+
+
+def _scan(elements, combine):
+    # inclusive Hillis-Steele prefix scan along axis 0; combine(earlier, later) must be associative
+    elements = list(elements)
+    shift = 1
+    while shift < len(elements[0]):
+        combined = combine([e[:-shift] for e in elements], [e[shift:] for e in elements])
+        for e, c in zip(elements, combined):
+            e[shift:] = c
+        shift *= 2
+    return elements
+
+
+def _compose_clamps(first, second):
+    # clip(clip(x + a1, l1, h1) + a2, l2, h2) == clip(x + a1 + a2, max(l1 + a2, l2), min(max(h1 + a2, l2), h2))
+    (a1, l1, h1), (a2, l2, h2) = first, second
+    return a1 + a2, np.maximum(l1 + a2, l2), np.minimum(np.maximum(h1 + a2, l2), h2)
+
+
+def _compose_affine(first, second):
+    # a2 * (a1 * x + b1) + b2
+    (a1, b1), (a2, b2) = first, second
+    return a1 * a2, b1 * a2 + b2
+
+
+def log_growth(model, utilization, dt):
+    """(T x assets) change of the log full utilization rate of every step before clamping."""
+    below = np.clip((model.min_target_utilization - utilization) / model.min_target_utilization, 0, None)
+    above = np.clip((utilization - model.max_target_utilization) / (1 - model.max_target_utilization), 0, None)
+    return np.log1p(above ** 2 * dt / model.rate_half_life) - np.log1p(below ** 2 * dt / model.rate_half_life)
+
+
+def interest_rate(model, utilization, full_rate):
+    """Per-second interest rate at `utilization` for the full utilization rate `full_rate`, for arrays broadcasting over assets."""
+    zero, target = model.zero_utilization_rate, model.target_utilization
+    target_rate = zero + (full_rate - zero) * model.target_rate_percent
+    return np.where(
+        utilization < target,
+        zero + utilization * (target_rate - zero) / target,
+        target_rate + (utilization - target) * (full_rate - target_rate) / (1 - target)
+    )
+
+
+def _step_seconds(utilization, dt):
+    # seconds every row holds; a DatetimeIndex gives the time to the next row (the last row repeats the previous interval)
+    if dt is None:
+        if not isinstance(utilization, pd.DataFrame) or not isinstance(utilization.index, pd.DatetimeIndex):
+            raise ValueError('dt is required unless the utilization is a DataFrame with a DatetimeIndex')
+        seconds = (utilization.index[1:] - utilization.index[:-1]).total_seconds().to_numpy()
+        return np.append(seconds, seconds[-1] if len(seconds) else 0.0)[:, None]
+    dt = np.asarray(dt, dtype=float)
+    return dt[:, None] if dt.ndim == 1 else dt
+
+
+def simulate_rates(model, utilization, dt=None, full_rate=None, record_every=1, chunk_size=1 << 12):
+    """
+    Replay the rate controller of every asset over `utilization`, a (T x assets) array or a DataFrame with one column per asset name
+    of `model`, each row held for `dt` seconds (a scalar or one value per row; taken from a DatetimeIndex if not given).
+
+    The full utilization rate starts at `full_rate` (default: `initial_full_utilization_rate`). Every `record_every`-th step of the
+    full rate and the interest rate is kept, so millions of steps need not be stored. Returns a `RateSimulation` with the recorded
+    paths, the rate accumulator (debt growth factor), the final full rate, the time weighted mean, minimum and maximum interest rate
+    and the fraction of time the full rate sits at its lower and upper bound.
+    """
+    seconds = _step_seconds(utilization, dt)
+    if isinstance(utilization, pd.DataFrame):
+        utilization = utilization[model.assets].to_numpy(dtype=float)
+    utilization = np.asarray(utilization, dtype=float)
+    n_steps, n_assets = utilization.shape
+    seconds = np.broadcast_to(seconds, (n_steps, 1))
+
+    lo, hi = np.log(model.min_full_utilization_rate), np.log(model.max_full_utilization_rate)
+    x = np.clip(np.log(model.initial_full_utilization_rate if full_rate is None else full_rate), lo, hi)
+    log_accumulator = np.zeros(n_assets)
+    min_rate, max_rate = np.full(n_assets, np.inf), np.full(n_assets, -np.inf)
+    at_min, at_max = np.zeros(n_assets), np.zeros(n_assets)
+    recorded_full, recorded_rate = [], []
+
+    for start in range(0, n_steps, chunk_size):
+        u = utilization[start:start + chunk_size]
+        step = seconds[start:start + chunk_size]
+        shift, lower, upper = _scan(
+            (log_growth(model, u, step), np.broadcast_to(lo, u.shape).copy(), np.broadcast_to(hi, u.shape).copy()),
+            _compose_clamps)
+        path = np.minimum(np.maximum(x + shift, lower), upper)
+        x = path[-1]
+
+        full = np.exp(path)
+        rate = interest_rate(model, u, full)
+        log_accumulator += (rate * step).sum(axis=0)
+        min_rate, max_rate = np.minimum(min_rate, rate.min(axis=0)), np.maximum(max_rate, rate.max(axis=0))
+        at_min += (np.isclose(path, lo, rtol=0, atol=BOUND_TOLERANCE) * step).sum(axis=0)
+        at_max += (np.isclose(path, hi, rtol=0, atol=BOUND_TOLERANCE) * step).sum(axis=0)
+
+        # steps start, start + record_every, ... of the whole run that fall into this chunk
+        first = -start % record_every
+        recorded_full.append(full[first::record_every])
+        recorded_rate.append(rate[first::record_every])
+
+    total = seconds.sum()
+    with np.errstate(invalid='ignore'):
+        return RateSimulation(
+            np.arange(0, n_steps, record_every),
+            total,
+            np.concatenate(recorded_full) if recorded_full else np.empty((0, n_assets)),
+            np.concatenate(recorded_rate) if recorded_rate else np.empty((0, n_assets)),
+            np.exp(log_accumulator),
+            np.exp(x),
+            log_accumulator / total,
+            min_rate,
+            max_rate,
+            at_min / total,
+            at_max / total
+        )
+
+
+def synthetic_utilization(n_steps, targets, dt=60, volatility=0.5, half_life=86400, max_utilization=None, seed=None, chunk_size=1 << 12):
+    """
+    (n_steps x assets) utilization paths that mean-revert to `targets`: an AR(1) process in logit space with a stationary standard
+    deviation of `volatility` and a mean reversion half-life of `half_life` seconds, sampled every `dt` seconds and starting at the
+    targets. Paths are capped at `max_utilization` if given. The recurrence is evaluated with the same prefix scan as the rate controller.
+    """
+    targets = np.atleast_1d(np.asarray(targets, dtype=float))
+    rng = np.random.default_rng(seed)
+    phi = 0.5 ** (dt / half_life)
+    mean = np.log(targets / (1 - targets))
+    logit = np.empty((n_steps, len(targets)))
+    x = mean
+    for start in range(0, n_steps, chunk_size):
+        noise = rng.standard_normal((min(chunk_size, n_steps - start), len(targets))) * (volatility * np.sqrt(1 - phi ** 2))
+        scale, shift = _scan((np.full(noise.shape, phi), noise + (1 - phi) * mean), _compose_affine)
+        logit[start:start + len(noise)] = scale * x + shift
+        x = logit[start + len(noise) - 1]
+    utilization = 1 / (1 + np.exp(-logit))
+    if max_utilization is not None:
+        utilization = np.minimum(utilization, max_utilization)
+    return utilization
+
+
+def summarize(model, result):
+    """Per-asset summary of a `RateSimulation` as a DataFrame, rates annualized."""
+    return pd.DataFrame({
+        "mean_rate": per_annum(result.mean_rate),
+        "min_rate": per_annum(result.min_rate),
+        "max_rate": per_annum(result.max_rate),
+        "initial_full_utilization_rate": per_annum(model.initial_full_utilization_rate),
+        "final_full_utilization_rate": per_annum(result.final_full_utilization_rate),
+        "time_at_min_full_rate": result.at_min,
+        "time_at_max_full_rate": result.at_max,
+        "debt_growth": result.accumulator
+    }, index=pd.Index(model.assets, name="asset_name"))
@@ -0,0 +1,97 @@
+"""
+DEX liquidity depth curves.
+
+For every (debt asset, collateral asset) pair the available DEX liquidity is stored as a curve over price-impact depths, e.g. the
+liquidity available at a 5% and at a 10% price impact. All curves share one depth grid and are kept as a compact (pairs x depths) array,
+so the liquidity of any number of pairs at any depth resolves in a single vectorized lookup.
+
+Between measured depths liquidity is interpolated linearly, which preserves the shape of the measured curve (no overshoot). Below the
+smallest measured depth the curve is anchored at zero liquidity for zero price impact, beyond the largest measured depth it is held
+constant at the last measured value.
+"""
+
+import numpy as np
+import pandas as pd
+
+DEPTH_DECIMALS = 2 # measured depths are price impacts quoted in whole percent
+
+
+def liquidation_depth(liquidation_discount):
+    """
+    Price impact depth at which liquidity is looked up for a `liquidation_discount` (array), i.e. the liquidation bonus 1 - discount.
+
+    Unlike measured depths it is not snapped to whole percent, so discounts between measured depths use the interpolated liquidity;
+    rounding to 12 places only strips the float noise of the subtraction.
+    """
+    return np.round(1 - np.asarray(liquidation_discount, dtype=float), 12)
+
+
+class LiquidityCurves:
+    """Liquidity depth curves of a set of pairs: `values[i, j]` is the liquidity of `pairs[i]` at a price impact of `depths[j]`."""
+
+    def __init__(self, pairs, depths, values):
+        self.pairs = [tuple(pair) for pair in pairs]
+        self.rows = {pair: i for i, pair in enumerate(self.pairs)}
+        depths = np.round(np.asarray(depths, dtype=float), DEPTH_DECIMALS)
+        values = np.asarray(values, dtype=float)
+        order = np.argsort(depths)
+        # prepend the zero liquidity at zero price impact anchor, then fill the gaps of every curve
+        self.depths = np.concatenate([[0.0], depths[order]])
+        self.values = _fill_gaps(self.depths, np.column_stack([np.zeros(len(self.pairs)), values[:, order]]))
+
+    @classmethod
+    def from_rows(cls, liquidity_data):
+        """Build the curves from liquidity rows (a list of dicts or a DataFrame) with depth, debt/collateral asset name and liquidity."""
+        df = pd.DataFrame(liquidity_data)
+        df['depth'] = df['depth'].round(DEPTH_DECIMALS)
+        keys = ['debt_asset_name', 'collateral_asset_name', 'depth']
+        duplicated = df.duplicated(keys)
+        if duplicated.any():
+            raise ValueError(f'Duplicate liquidity rows for {df.loc[duplicated, keys].to_records(index=False).tolist()}')
+        wide = df.pivot(index=['debt_asset_name', 'collateral_asset_name'], columns='depth', values='liquidity')
+        return cls(wide.index.tolist(), wide.columns.to_numpy(), wide.to_numpy())
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def lookup(self, debt, collateral, depth):
+        """Liquidity for each (debt, collateral, depth) triple, NaN for pairs without a curve."""
+        debt, collateral = np.atleast_1d(debt), np.atleast_1d(collateral)
+        depth = np.broadcast_to(np.asarray(depth, dtype=float), debt.shape)
+        rows = np.fromiter((self.rows.get(pair, -1) for pair in zip(debt.tolist(), collateral.tolist())), dtype=np.intp, count=len(debt))
+        known = rows >= 0
+        rows = np.where(known, rows, 0)
+
+        # bracket every depth on the shared grid and interpolate, depths beyond the grid hold the last value
+        last = len(self.depths) - 1
+        right = np.clip(np.searchsorted(self.depths, depth, side='right'), 1, last)
+        left = right - 1
+        t = np.clip((depth - self.depths[left]) / (self.depths[right] - self.depths[left]), 0, 1)
+        liquidity = self.values[rows, left] * (1 - t) + self.values[rows, right] * t
+        return np.where(known, liquidity, np.nan)
+
+
+def _fill_gaps(depths, values):
+    # linearly interpolate the missing points of every row between its neighbouring known points on the shared depth grid;
+    # the first column is always known, missing points after the last known one hold its value
+    grid = np.arange(values.shape[1])
+    known = ~np.isnan(values)
+    prev = np.maximum.accumulate(np.where(known, grid, 0), axis=1)
+    next_ = np.minimum.accumulate(np.where(known, grid, grid[-1] + 1)[:, ::-1], axis=1)[:, ::-1]
+    beyond = next_ > grid[-1]
+    next_ = np.where(beyond, prev, next_)
+    rows = np.arange(values.shape[0])[:, None]
+    lo, hi = values[rows, prev], values[rows, next_]
+    span = np.where(next_ > prev, depths[next_] - depths[prev], 1)
+    t = (depths - depths[prev]) / span
+    return np.where(known, values, lo + (hi - lo) * t)
+
+
+def liquidity_table(liquidity_data):
+    """Liquidity depth curves of all pairs in a list of liquidity rows (or a DataFrame), see `LiquidityCurves`."""
+    return LiquidityCurves.from_rows(liquidity_data)
+
+
+def lookup_liquidity(table, debt, collateral, depth):
+    """Liquidity for each (debt, collateral, depth) triple, NaN for pairs without liquidity data."""
+    return table.lookup(np.asarray(debt, dtype=object), np.asarray(collateral, dtype=object), depth)
@@ -0,0 +1,199 @@
+"""
+Smart LTV stage.
+
+Implements BProtocol/RiskDAO's Smart LTV formula
+
+    LTV = exp(-(1/r) * sigma / sqrt(l/d)) - beta
+
+for all lending pairs of a pool at once, and sweeps it over grids of risk_level_factor, debt_cap and liquidation_discount.
+
+The formula also inverts in closed form, giving the largest debt cap (or the smallest risk level factor) that still yields a target LTV:
+
+    d = l * (r * -log(LTV + beta) / sigma)^2        r = sigma * sqrt(d/l) / -log(LTV + beta)
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .liquidity import liquidation_depth, lookup_liquidity
+
+
+class MissingLiquidityError(LookupError):
+    """
+    Raised when liquidity or volatility is unavailable for one or more pairs. All affected pairs are listed in `pairs` as
+    (debt, collateral, depth, missing) tuples, `missing` naming the unavailable inputs ("liquidity", "volatility").
+    """
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+        def inputs(depth, missing):
+            return ' and '.join(f'liquidity at depth {depth}' if name == "liquidity" else name for name in missing)
+
+        super().__init__('Missing data for ' + ', '.join(f'{d}/{c} ({inputs(depth, missing)})' for d, c, depth, missing in pairs))
+
+
+class DebtCapError(ValueError):
+    """Raised when no finite debt cap yields the target LTV of one or more pairs. All affected pairs are listed in `pairs`."""
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+        super().__init__('No debt cap for ' + ', '.join(f'{c}/{d} ({reason})' for c, d, reason in pairs))
+
+
+def smart_ltv(volatility, liquidity, debt_cap, risk_level_factor, discount):
+    """
+    Smart LTV for arrays (or scalars) of inputs.
+
+    `volatility` is the pair's price volatility, `liquidity` the DEX liquidity available at a price impact of `discount` (the
+    liquidation bonus), `debt_cap` the targeted total debt and `risk_level_factor` the risk level.
+    """
+    exponent = (1 / risk_level_factor) * (volatility / np.sqrt(liquidity / debt_cap))
+    return np.exp(-exponent) - discount
+
+
+def _log_target(target_ltv, discount):
+    # -log(LTV + beta): 0 for LTV + beta = 1 and NaN beyond, +inf when LTV + beta <= 0 (any debt is acceptable)
+    total = np.asarray(target_ltv, dtype=float) + discount
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total > 1, np.nan, np.where(total > 0, np.log(1 / total), np.inf))
+
+
+def debt_cap_for_ltv(target_ltv, volatility, liquidity, risk_level_factor, discount):
+    """
+    Largest debt cap for which the Smart LTV is at least `target_ltv`, for arrays (or scalars) of inputs.
+
+    It is 0 when the target is only reached without debt or there is no liquidity, NaN when it is not reachable at all
+    (target + discount > 1) and infinite for pairs with liquidity but without volatility.
+    """
+    log_target = _log_target(target_ltv, discount)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        caps = liquidity * (risk_level_factor * log_target / volatility) ** 2
+    return np.where((liquidity == 0) & ~np.isnan(log_target), 0.0, caps)
+
+
+def risk_level_factor_for_ltv(target_ltv, volatility, liquidity, debt_cap, discount):
+    """Smallest risk level factor for which the Smart LTV is at least `target_ltv`, for arrays (or scalars) of inputs."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return volatility * np.sqrt(debt_cap / liquidity) / _log_target(target_ltv, discount)
+
+
+def _pair_inputs(pair_parameters, volatility, liquidity):
+    # (beta, liquidity at depth beta, volatility) of every pair, all missing pairs reported at once
+    debt = [p["debt_asset_name"] for p in pair_parameters]
+    collateral = [p["collateral_asset_name"] for p in pair_parameters]
+    discount = liquidation_depth([p["liquidation_discount"] for p in pair_parameters])
+
+    liq = lookup_liquidity(liquidity, debt, collateral, discount)
+    vola = volatility.reindex(pd.MultiIndex.from_arrays([collateral, debt])).to_numpy(dtype=float)
+
+    unavailable = {"liquidity": np.isnan(liq), "volatility": np.isnan(vola)}
+    missing = np.flatnonzero(unavailable["liquidity"] | unavailable["volatility"])
+    if len(missing):
+        raise MissingLiquidityError([(debt[i], collateral[i], discount[i], tuple(name for name, m in unavailable.items() if m[i]))
+                                     for i in missing])
+    return discount, liq, vola
+
+
+def compute_ltvs(pair_parameters, volatility, liquidity):
+    """
+    Compute the Max LTV of every pair in `pair_parameters` and set its `max_ltv` and `shutdown_ltv`.
+
+    `volatility` is a Series indexed by (collateral, debt) and `liquidity` a table from `liquidity_table`. Pairs without liquidity
+    or volatility data are reported together in a `MissingLiquidityError`. Returns the array of (rounded) Max LTVs.
+    """
+    discount, liq, vola = _pair_inputs(pair_parameters, volatility, liquidity)
+    debt_cap = np.array([p["debt_cap"] for p in pair_parameters], dtype=float)
+    risk_level_factor = np.array([p["risk_level_factor"] for p in pair_parameters], dtype=float)
+
+    ltv = np.round(smart_ltv(vola, liq, debt_cap, risk_level_factor, discount), 2)
+    for p, value in zip(pair_parameters, ltv):
+        p["max_ltv"] = float(value)
+        p["shutdown_ltv"] = 1
+    return ltv
+
+
+def compute_debt_caps(pair_parameters, volatility, liquidity, target_ltv=None, max_debt_cap=None):
+    """
+    Set the `debt_cap` of every pair to the largest whole cap that still yields `target_ltv` (a scalar, an array with one target per
+    pair, or by default each pair's own `max_ltv`) and return the array of caps.
+
+    Caps are limited to `max_debt_cap` if given, which also bounds the otherwise unlimited cap of pairs without volatility. Pairs whose
+    target is unreachable (target + liquidation bonus > 1), or whose cap is unlimited without a `max_debt_cap`, are reported together
+    in a `DebtCapError` and no cap is written.
+    """
+    discount, liq, vola = _pair_inputs(pair_parameters, volatility, liquidity)
+    if target_ltv is None:
+        target_ltv = np.array([p["max_ltv"] for p in pair_parameters], dtype=float)
+    risk_level_factor = np.array([p["risk_level_factor"] for p in pair_parameters], dtype=float)
+
+    caps = debt_cap_for_ltv(target_ltv, vola, liq, risk_level_factor, discount)
+    if max_debt_cap is not None:
+        caps = np.minimum(caps, max_debt_cap)
+    invalid = np.flatnonzero(~np.isfinite(caps))
+    if len(invalid):
+        raise DebtCapError([(pair_parameters[i]["collateral_asset_name"], pair_parameters[i]["debt_asset_name"],
+                             'target LTV unreachable' if np.isnan(caps[i]) else 'unlimited, set max_debt_cap') for i in invalid])
+    caps = np.floor(caps)
+    for p, cap in zip(pair_parameters, caps):
+        p["debt_cap"] = int(cap)
+    return caps
+
+
+class Sweep(namedtuple('Sweep', 'ltv pairs liquidation_discounts risk_level_factors debt_caps')):
+    """
+    Result of `sweep`. `ltv` has shape (pairs, liquidation_discounts, risk_level_factors, debt_caps).
+
+    An axis for which no grid was given has length one and holds the pairs' own values, which are then reported per pair in `to_frame`.
+    """
+
+    def to_frame(self):
+        """Tidy DataFrame with one row per (pair, liquidation_discount, risk_level_factor, debt_cap)."""
+        shape = self.ltv.shape
+        index = np.indices(shape).reshape(len(shape), -1)
+        columns = {
+            "collateral_asset_name": np.array([c for c, _ in self.pairs], dtype=object)[index[0]],
+            "debt_asset_name": np.array([d for _, d in self.pairs], dtype=object)[index[0]]
+        }
+        for axis, name in enumerate(["liquidation_discount", "risk_level_factor", "debt_cap"], start=1):
+            grid = np.asarray(self[axis + 1])
+            columns[name] = grid[index[0], index[axis]] if grid.ndim == 2 else grid[index[axis]]
+        columns["max_ltv"] = self.ltv.reshape(-1)
+        return pd.DataFrame(columns)
+
+
+def _grid(values, own):
+    # a user supplied grid (or a single value) is shared by all pairs, otherwise every pair keeps its own value
+    if values is None:
+        return own[:, None]
+    return np.atleast_1d(np.asarray(values, dtype=float))
+
+
+def sweep(pair_parameters, volatility, liquidity, liquidation_discounts=None, risk_level_factors=None, debt_caps=None):
+    """
+    Evaluate the Smart LTV of every pair over the cartesian product of the given grids in one broadcasted pass.
+
+    Grids that are not given default to each pair's own value. Pairs without liquidity data are NaN.
+    """
+    pairs = [(p["collateral_asset_name"], p["debt_asset_name"]) for p in pair_parameters]
+    debt = np.array([d for _, d in pairs], dtype=object)
+    collateral = np.array([c for c, _ in pairs], dtype=object)
+    discounts = _grid(liquidation_discounts, np.array([p["liquidation_discount"] for p in pair_parameters], dtype=float))
+    factors = _grid(risk_level_factors, np.array([p["risk_level_factor"] for p in pair_parameters], dtype=float))
+    caps = _grid(debt_caps, np.array([p["debt_cap"] for p in pair_parameters], dtype=float))
+
+    # liquidity at every (pair, depth), shape (P, D); depths between measured points are interpolated
+    depth = liquidation_depth(np.broadcast_to(discounts, (len(pairs), discounts.shape[-1])))
+    liq = lookup_liquidity(liquidity, np.repeat(debt, depth.shape[1]), np.repeat(collateral, depth.shape[1]), depth.reshape(-1))
+    liq = liq.reshape(depth.shape)
+    vola = volatility.reindex(pd.MultiIndex.from_arrays([collateral, debt])).to_numpy(dtype=float)
+
+    ltv = smart_ltv(
+        vola[:, None, None, None],
+        liq[:, :, None, None],
+        caps.reshape(-1 if caps.ndim == 2 else 1, 1, 1, caps.shape[-1]),
+        factors.reshape(-1 if factors.ndim == 2 else 1, 1, factors.shape[-1], 1),
+        depth[:, :, None, None]
+    )
+    return Sweep(ltv, pairs, discounts, factors, caps)
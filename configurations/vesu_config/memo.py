@@ -0,0 +1,206 @@
+"""
+Content-hash memoization of pipeline stages.
+
+Stage results are stored in a local SQLite file keyed by a hash of the stage name and the stage's inputs. Stages that work per pair or per
+asset (volatility, LTV, rates) are memoized per entry, so after changing one pair's `debt_cap` only that pair's LTV is recomputed. The cache
+is bounded in size: when it grows beyond `max_bytes`, the least recently used entries are evicted.
+
+Every key is salted with the version of its stage in `STAGE_VERSIONS`. Bump the version when a stage's computation changes, so results of
+the old code are never returned (they are evicted in time).
+"""
+
+import hashlib
+import json
+import pickle
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+# version of every memoized stage's computation, part of its keys
+STAGE_VERSIONS = {
+    "volatility": 1,
+    "ltv": 2,   # 2: liquidity at the exact liquidation depth
+    "rates": 2  # 2: exact rounding to 1e18 fixed point
+}
+
+
+def _json_default(obj):
+    # numpy scalars hash like the equivalent python numbers
+    return obj.item() if hasattr(obj, 'item') else repr(obj)
+
+
+def _update(h, obj):
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        h.update(b'pandas')
+        if isinstance(obj, pd.DataFrame):
+            _update(h, [str(c) for c in obj.columns])
+        h.update(pd.util.hash_pandas_object(obj, index=not isinstance(obj, pd.Index)).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(f'ndarray{obj.dtype}{obj.shape}'.encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    else:
+        h.update(json.dumps(obj, sort_keys=True, default=_json_default).encode())
+    h.update(b'\x00')
+
+
+def content_hash(*parts):
+    """Stable hash of JSON-like values, NumPy arrays and pandas objects."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        _update(h, part)
+    return h.hexdigest()
+
+
+class MemoCache:
+    """Size-bounded key/value store of pickled stage results in a SQLite file. Safe to share between processes."""
+
+    def __init__(self, path, max_bytes=256 * 2 ** 20):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self._connection = None
+
+    def __getstate__(self):
+        # worker processes open their own connection
+        return {'path': self.path, 'max_bytes': self.max_bytes, '_connection': None}
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, value BLOB, size INTEGER, accessed REAL)')
+        return self._connection
+
+    def get_many(self, keys):
+        """Dict of the cached values of `keys`; missing keys are left out."""
+        found = {}
+        keys = list(keys)
+        with self.connection as db:
+            for start in range(0, len(keys), 900): # stay below SQLite's host parameter limit
+                chunk = keys[start:start + 900]
+                rows = db.execute(f'SELECT key, value FROM memo WHERE key IN ({",".join("?" * len(chunk))})', chunk).fetchall()
+                found.update((key, pickle.loads(value)) for key, value in rows)
+            now = time.time()
+            db.executemany('UPDATE memo SET accessed = ? WHERE key = ?', [(now, key) for key in found])
+        return found
+
+    def put_many(self, items):
+        """Store a dict of values and evict the least recently used entries beyond `max_bytes`."""
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            rows.append((key, blob, len(blob), now))
+        with self.connection as db:
+            db.executemany('INSERT OR REPLACE INTO memo VALUES (?, ?, ?, ?)', rows)
+        self.evict()
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def put(self, key, value):
+        self.put_many({key: value})
+
+    def size(self):
+        return self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM memo').fetchone()[0]
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fits in `max_bytes`."""
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+        with self.connection as db:
+            removed = 0
+            victims = []
+            for key, size in db.execute('SELECT key, size FROM memo ORDER BY accessed'):
+                victims.append((key,))
+                removed += size
+                if removed >= excess:
+                    break
+            db.executemany('DELETE FROM memo WHERE key = ?', victims)
+
+    def clear(self):
+        with self.connection as db:
+            db.execute('DELETE FROM memo')
+
+
+def memoize_many(cache, stage, keys, compute):
+    """
+    Values of a per-entry stage for every key in `keys`, computing only the missing ones.
+
+    `compute(indices)` must return the values of the entries at `indices` in that order. With `cache=None` everything is computed.
+    Returns (values, number of cache hits).
+    """
+    if cache is None:
+        return list(compute(list(range(len(keys))))), 0
+    salt = f'{stage}@{STAGE_VERSIONS.get(stage, 0)}'
+    full_keys = [f'{salt}:{key}' for key in keys]
+    found = cache.get_many(set(full_keys))
+    missing = [i for i, key in enumerate(full_keys) if key not in found]
+    if missing:
+        computed = list(compute(missing))
+        new = {full_keys[i]: value for i, value in zip(missing, computed)}
+        cache.put_many(new)
+        found.update(new)
+    return [found[key] for key in full_keys], len(keys) - len(missing)
+
+
+# memoized variants of the per-pair and per-asset stages
+
+def memo_pair_volatility(cache, returns, pairs):
+    """`returns.pair_volatility` recomputing only the pairs whose collateral or debt return history changed."""
+    from .returns import pair_volatility
+    index = content_hash(returns.index)
+    values = returns.to_numpy()
+    columns = {c: content_hash(index, values[:, j]) for j, c in enumerate(returns.columns)}
+    keys = [content_hash(columns.get(c), columns.get(d)) for c, d in pairs]
+    values, _ = memoize_many(cache, 'volatility', keys, lambda indices: pair_volatility(returns, [pairs[i] for i in indices]).to_numpy())
+    return pd.Series(values, index=pd.MultiIndex.from_tuples(pairs), dtype=float)
+
+
+LTV_INPUTS = ["collateral_asset_name", "debt_asset_name", "liquidation_discount", "risk_level_factor", "debt_cap"]
+
+
+def memo_ltvs(cache, pair_parameters, volatility, liquidity):
+    """`ltv.compute_ltvs` recomputing only the pairs whose parameters, volatility or liquidity curve changed."""
+    from .ltv import compute_ltvs
+
+    def compute(indices):
+        subset = [dict(pair_parameters[i]) for i in indices]
+        compute_ltvs(subset, volatility, liquidity)
+        return [(p["max_ltv"], p["shutdown_ltv"]) for p in subset]
+
+    # one digest per liquidity curve, the per-pair keys then only hash short strings
+    pairs = [(p["collateral_asset_name"], p["debt_asset_name"]) for p in pair_parameters]
+    vola = volatility.reindex(pd.MultiIndex.from_tuples(pairs)).to_numpy(dtype=float)
+    depths = content_hash(liquidity.depths)
+    curves = {}
+    keys = []
+    for p, pair, v in zip(pair_parameters, pairs, vola.tolist()):
+        row = liquidity.rows.get(pair[::-1])
+        if row not in curves:
+            curves[row] = content_hash(liquidity.values[row]) if row is not None else None
+        scalars = repr(([p[k] for k in LTV_INPUTS], v, depths, curves[row]))
+        keys.append(hashlib.blake2b(scalars.encode(), digest_size=16).hexdigest())
+    values, _ = memoize_many(cache, 'ltv', keys, compute)
+    for p, (max_ltv, shutdown_ltv) in zip(pair_parameters, values):
+        p["max_ltv"] = max_ltv
+        p["shutdown_ltv"] = shutdown_ltv
+    return np.array([max_ltv for max_ltv, _ in values])
+
+
+def memo_rates(cache, asset_parameters):
+    """`config.convert_rates` reusing the conversions of unchanged assets."""
+    from .config import RATE_FIELDS, convert_rates
+
+    def compute(indices):
+        subset = [{field: asset_parameters[i][field] for field in RATE_FIELDS} for i in indices]
+        convert_rates(subset)
+        return subset
+
+    keys = [content_hash([a[field] for field in RATE_FIELDS]) for a in asset_parameters]
+    values, _ = memoize_many(cache, 'rates', keys, compute)
+    for a, rates in zip(asset_parameters, values):
+        a.update(rates)
@@ -0,0 +1,126 @@
+"""
+Local mock of the CoinGecko `market_chart` endpoint.
+
+Serves deterministic synthetic daily price histories so that the fetch stage can be exercised offline. A fraction of requests can be
+answered with 429 or 500 errors to exercise the retry logic, or the first requests of every coin with given statuses. Each response
+can be delayed to exercise the concurrency bound; the handler counts the requests served and the most requests in flight at once.
+
+    python -m vesu_config.mock_server --port 8765 --error-rate 0.2
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DAY_MS = 86400000
+START_MS = 1640995200000 # 2022-01-01
+
+
+def synthetic_prices(coin, days=1000, start_ms=START_MS):
+    """Deterministic geometric random walk seeded by the coin id."""
+    rng = random.Random(zlib.crc32(coin.encode()))
+    price = 10 ** rng.uniform(-1, 4)
+    prices = []
+    for i in range(days):
+        prices.append([start_ms + i * DAY_MS, price])
+        price *= math.exp(rng.gauss(0, 0.04))
+    return prices
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    error_rate = 0.0
+    failures = ()
+    delay = 0.0
+    days = 1000
+    requests = 0
+    in_flight = 0
+    peak = 0
+    attempts = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.requests += 1
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+        try:
+            self.respond()
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def respond(self):
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        if len(parts) < 3 or parts[-3] != 'coins' or parts[-1] != 'market_chart':
+            return self.reply(404, {'error': 'not found'})
+        coin = parts[-2]
+        with self.lock:
+            attempt = self.attempts[coin] = self.attempts.get(coin, 0) + 1
+        time.sleep(self.delay)
+        if attempt <= len(self.failures):
+            return self.reply(self.failures[attempt - 1], {'error': 'injected failure'}, {'Retry-After': '0'})
+        if random.random() < self.error_rate:
+            return self.reply(random.choice([429, 500]), {'error': 'injected failure'}, {'Retry-After': '0'})
+
+        query = parse_qs(url.query)
+        # with a dict of days per coin, coins listed later have shorter histories that end on the same day
+        end = max(self.days.values()) if isinstance(self.days, dict) else self.days
+        history = self.days.get(coin, end) if isinstance(self.days, dict) else self.days
+        prices = synthetic_prices(coin, history, START_MS + (end - history) * DAY_MS)
+        days = query.get('days', ['max'])[0]
+        if days != 'max':
+            prices = prices[-(int(days) + 1):]
+        self.reply(200, {'prices': prices, 'market_caps': [], 'total_volumes': []})
+
+    def reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve(port=0, error_rate=0.0, days=1000, failures=(), delay=0.0):
+    """
+    Run the mock server in a background thread and yield its base url and handler class. `days` is the length of every history or a
+    dict of coin to length. `failures` are the statuses answered to the first requests of every coin, in order. The handler's
+    `requests` and `peak` count the requests served and the most requests in flight at once.
+    """
+    handler = type('Handler', (MockHandler,), {'error_rate': error_rate, 'failures': tuple(failures), 'delay': delay, 'days': days,
+                                               'requests': 0, 'in_flight': 0, 'peak': 0, 'attempts': {}, 'lock': threading.Lock()})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}/api/v3/', handler
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--days', type=int, default=1000)
+    args = parser.parse_args()
+    MockHandler.error_rate, MockHandler.days = args.error_rate, args.days
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), MockHandler)
+    print(f'Serving mock CoinGecko API on http://127.0.0.1:{args.port}/api/v3/')
+    server.serve_forever()
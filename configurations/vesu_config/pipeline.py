@@ -0,0 +1,94 @@
+"""
+Library API of the configuration pipeline.
+
+Each stage of the notebook is exposed as a function without side effects beyond its return value (`emit` writes a file only when given a
+path). Stages import their numerical dependencies (pandas, numpy, requests) on first use, so importing this module is cheap. Every stage
+is recorded by the active `vesu_config.instrument.Recorder`, if any. `volatility`, `ltv` and `rates` take an optional
+`vesu_config.memo.MemoCache` and then only recompute the pairs and assets whose inputs changed.
+
+    prices = fetch(coins, api_key, cache_dir='.price_cache')
+    vola = volatility(prices, pairs, '2022-01-01', '2024-04-30')
+    liq = liquidity(liquidity_data)
+    ltv(pair_parameters, vola, liq)
+    rates(asset_parameters)
+    emit(pool_parameters, asset_parameters, pair_parameters, 'config.json')
+"""
+
+from .instrument import stage
+
+
+def fetch(coins, api_key=None, cache_dir=None, **kwargs):
+    """Fetch the daily USD prices of `coins` (CoinGecko ids) into one DataFrame, see `vesu_config.fetch.fetch_all_prices`."""
+    from .cache import PriceCache
+    from .fetch import fetch_all_prices
+    cache = PriceCache(cache_dir) if cache_dir else None
+    with stage('fetch', coins=len(coins)):
+        return fetch_all_prices(coins, api_key, cache=cache, **kwargs)
+
+
+def volatility(prices, pairs, start_date=None, end_date=None, memo=None):
+    """
+    Worst-case daily volatility of the (collateral, debt) `pairs` over the `start_date`..`end_date` window of `prices` (a DataFrame or
+    `vesu_config.store.PriceMatrix`).
+    """
+    from .memo import memo_pair_volatility
+    from .returns import log_returns, pair_volatility
+    from .store import window
+    prices = window(prices, start_date, end_date)
+    with stage('returns', days=len(prices), assets=len(prices.columns)):
+        returns = log_returns(prices)
+    with stage('volatility', pairs=len(pairs)):
+        return pair_volatility(returns, pairs) if memo is None else memo_pair_volatility(memo, returns, pairs)
+
+
+def liquidity(liquidity_data):
+    """Liquidity depth curves of all (debt, collateral) pairs, interpolated between measured depths (a `LiquidityCurves`)."""
+    from .liquidity import liquidity_table
+    with stage('liquidity', rows=len(liquidity_data)):
+        return liquidity_table(liquidity_data)
+
+
+def ltv(pair_parameters, volatility, liquidity, memo=None):
+    """Set `max_ltv` and `shutdown_ltv` of every pair (in place) and return `pair_parameters`."""
+    from .ltv import compute_ltvs
+    from .memo import memo_ltvs
+    with stage('ltv', pairs=len(pair_parameters)):
+        if memo is None:
+            compute_ltvs(pair_parameters, volatility, liquidity)
+        else:
+            memo_ltvs(memo, pair_parameters, volatility, liquidity)
+    return pair_parameters
+
+
+def debt_caps(pair_parameters, volatility, liquidity, target_ltv=None, max_debt_cap=None):
+    """
+    Set `debt_cap` of every pair (in place) to the largest cap that yields `target_ltv` (default: each pair's `max_ltv`) and return
+    `pair_parameters`, see `vesu_config.ltv.compute_debt_caps`.
+    """
+    from .ltv import compute_debt_caps
+    with stage('debt_caps', pairs=len(pair_parameters)):
+        compute_debt_caps(pair_parameters, volatility, liquidity, target_ltv, max_debt_cap)
+    return pair_parameters
+
+
+def rates(asset_parameters, memo=None):
+    """Convert the per-annum rate fields of every asset to per-second rates (in place) and return `asset_parameters`."""
+    from .config import convert_rates
+    from .memo import memo_rates
+    with stage('rates', assets=len(asset_parameters)):
+        if memo is None:
+            convert_rates(asset_parameters)
+        else:
+            memo_rates(memo, asset_parameters)
+    return asset_parameters
+
+
+def emit(pool_parameters, asset_parameters, pair_parameters, path=None):
+    """Add the asset addresses to the pairs, combine the parameter sets and write them to `path` if given. Returns the configuration."""
+    from .config import add_addresses, build_config, write_config
+    with stage('emit', pairs=len(pair_parameters)):
+        add_addresses(pair_parameters, asset_parameters)
+        parameters = build_config(pool_parameters, asset_parameters, pair_parameters)
+        if path is not None:
+            write_config(parameters, path)
+    return parameters
@@ -0,0 +1,206 @@
+"""
+Asset and pool registry.
+
+Loads the per-network pool listings (`pools_sn_*.json`), the deployments (`deployments/deployment_sn_*_v*.json`) and the asset parameters
+of the pool configurations (`configurations/config_*_sn_*.json`, which map CoinGecko ids to token addresses) once into hash indexes:
+
+    registry = Registry.load()
+    registry.asset('0x4718f5a0fc34cc1af16a1cdee98ffb20c31f5cd61d6ab07201858f4287c938d', 'mainnet').symbol   # 'STRK'
+    registry.network('mainnet').assets_by_symbol('ETH')
+    registry.listing_by_v_token('0x021fe2ca1b7e731e4a5ef7df2881356070c5d72db4b2d19f9195f6b641f75df0').pool_id
+    registry.deployment('mainnet', 'v2').contracts['poolFactory']
+
+Addresses are normalized to lower case, zero padded hex and pool ids to integers, so lookups do not depend on how a file spells them.
+Symbols and CoinGecko ids are not unique (e.g. a legacy and a current wstETH), their lookups return tuples. Assets that only appear in a
+deployment have no metadata. Like `vesu_config.spec`, this module only depends on the standard library.
+"""
+
+import json
+import re
+from collections import namedtuple
+from pathlib import Path
+
+DEFAULT_ROOT = Path(__file__).resolve().parents[2]
+
+NETWORKS = {"main": "mainnet", "mainnet": "mainnet", "sepolia": "sepolia"}
+
+Asset = namedtuple('Asset', 'network address symbol name decimals coingecko_ids logo_uri')
+Listing = namedtuple('Listing', 'network pool_id asset v_token listed_block_number')
+Pool = namedtuple('Pool', 'network pool_id name assets')
+Deployment = namedtuple('Deployment', 'network version contracts assets pools')
+
+
+def normalize_address(address):
+    """Lower case, zero padded 0x-hex form of a Starknet address given as hex string or integer."""
+    value = address if isinstance(address, int) else int(address, 16)
+    return f'0x{value:064x}'
+
+
+def normalize_pool_id(pool_id):
+    """Integer form of a pool id given as decimal string, hex string or integer."""
+    if isinstance(pool_id, int):
+        return pool_id
+    return int(pool_id, 16) if pool_id.lower().startswith('0x') else int(pool_id)
+
+
+def network_name(name):
+    """Canonical network name ("mainnet" or "sepolia") of a network name or a file name such as `config_prime_sn_main.json`."""
+    match = re.search(r'sn_(main|mainnet|sepolia)\b', name) or re.fullmatch(r'(main|mainnet|sepolia)', name)
+    if match is None:
+        raise ValueError(f'Unknown network {name}')
+    return NETWORKS[match.group(1)]
+
+
+def _load_json(path):
+    with open(path) as infile:
+        return json.load(infile)
+
+
+class Registry:
+    """
+    Hash indexes over assets, pools, vToken listings and deployments. `network` returns a filtered view of one network, `deployment` a
+    `Deployment` record and `deployment_assets` the assets of a deployment.
+    """
+
+    def __init__(self, assets=(), pools=(), listings=(), deployments=()):
+        self.assets = list(assets)
+        self.pools = list(pools)
+        self.listings = list(listings)
+        self.deployments = list(deployments)
+
+        self._assets = {(a.network, a.address): a for a in self.assets}
+        self._addresses, self._symbols, self._coingecko_ids = {}, {}, {}
+        for a in self.assets:
+            self._addresses.setdefault(a.address, []).append(a)
+            if a.symbol is not None:
+                self._symbols.setdefault(a.symbol.lower(), []).append(a)
+            for coingecko_id in a.coingecko_ids:
+                self._coingecko_ids.setdefault(coingecko_id, []).append(a)
+        self._pools = {p.pool_id: p for p in self.pools}
+        self._v_tokens = {listing.v_token: listing for listing in self.listings}
+        self._listings = {(listing.pool_id, listing.asset): listing for listing in self.listings}
+        self._deployments = {(d.network, d.version): d for d in self.deployments}
+        self._views = {}
+
+    @classmethod
+    def load(cls, root=DEFAULT_ROOT):
+        """Load the registry from the pool listings, deployments and pool configurations of the repository at `root`."""
+        root = Path(root)
+        assets, pools, listings, deployments = {}, [], [], []
+
+        def add_asset(network, address, **fields):
+            key = (network, normalize_address(address))
+            known = assets.get(key, {"network": key[0], "address": key[1], "symbol": None, "name": None, "decimals": None,
+                                     "coingecko_ids": (), "logo_uri": None})
+            known["coingecko_ids"] += tuple(i for i in fields.pop("coingecko_ids", ()) if i not in known["coingecko_ids"])
+            # the first source to name a field wins, pool listings are read first
+            for field, value in fields.items():
+                if known[field] is None:
+                    known[field] = value
+            assets[key] = known
+
+        for path in sorted(root.glob('pools_sn_*.json')):
+            network = network_name(path.stem)
+            data = _load_json(path)
+            for pool in data["pools"]:
+                pool_id = normalize_pool_id(pool["pool_id"])
+                for a in pool["assets"]:
+                    add_asset(network, a["asset"], symbol=a["symbol"], name=a["name"], decimals=a["decimals"], logo_uri=a.get("logo_uri"))
+                    listings.append(Listing(network, pool_id, normalize_address(a["asset"]), normalize_address(a["vToken"]),
+                                            a.get("listed_block_number")))
+                pools.append(Pool(network, pool_id, pool["pool_name"], tuple(normalize_address(a["asset"]) for a in pool["assets"])))
+
+        for path in sorted(root.glob('configurations/config_*_sn_*.json')):
+            network = network_name(path.stem)
+            for a in _load_json(path)["asset_parameters"]:
+                token = a["token"]
+                add_asset(network, token["address"], symbol=token["symbol"], name=token["name"], decimals=token["decimals"],
+                          logo_uri=a.get("logo_uri"), coingecko_ids=(a["asset_name"],))
+
+        for path in sorted(root.glob('deployments/deployment_sn_*_v*.json')):
+            match = re.fullmatch(r'deployment_sn_(\w+?)_(v[\d.]+)', path.stem)
+            network, version = network_name(match.group(1)), match.group(2)
+            data = _load_json(path)
+            contracts = {k: v for k, v in data.items() if k not in ("assets", "pools")}
+            deployed = tuple(normalize_address(a) for a in data.get("assets", []))
+            for address in deployed:
+                add_asset(network, address)
+            deployments.append(Deployment(network, version, contracts, deployed,
+                                          tuple(normalize_pool_id(p) for p in data.get("pools", []))))
+
+        return cls([Asset(**a) for a in assets.values()], pools, listings, deployments)
+
+    def __repr__(self):
+        return (f'Registry({len(self.assets)} assets, {len(self.pools)} pools, {len(self.listings)} listings, '
+                f'{len(self.deployments)} deployments)')
+
+    # lookups
+
+    def asset(self, address, network):
+        """Asset with token `address` on `network`, KeyError if unknown."""
+        return self._assets[(network_name(network), normalize_address(address))]
+
+    def assets_by_symbol(self, symbol):
+        """Assets with `symbol` (case insensitive)."""
+        return tuple(self._symbols.get(symbol.lower(), ()))
+
+    def assets_by_coingecko_id(self, coingecko_id):
+        """Assets priced with the CoinGecko id `coingecko_id`."""
+        return tuple(self._coingecko_ids.get(coingecko_id, ()))
+
+    def pool(self, pool_id):
+        """Pool with `pool_id` (decimal, hex or integer), KeyError if unknown."""
+        return self._pools[normalize_pool_id(pool_id)]
+
+    def listing(self, pool_id, address):
+        """Listing of the asset at `address` in pool `pool_id`, KeyError if the asset is not listed there."""
+        return self._listings[(normalize_pool_id(pool_id), normalize_address(address))]
+
+    def listing_by_v_token(self, v_token):
+        """Listing whose vToken is at `v_token`, KeyError if unknown."""
+        return self._v_tokens[normalize_address(v_token)]
+
+    def pool_assets(self, pool_id):
+        """Assets listed in pool `pool_id`."""
+        pool = self.pool(pool_id)
+        return tuple(self._assets[(pool.network, address)] for address in pool.assets)
+
+    def resolve(self, key):
+        """Everything `key` (symbol, CoinGecko id, token or vToken address, pool id) refers to, as a list of records."""
+        found = list(self.assets_by_symbol(key)) + list(self.assets_by_coingecko_id(key))
+        try:
+            address = normalize_address(key)
+        except ValueError:
+            address = None
+        if address is not None:
+            found += self._addresses.get(address, [])
+            if address in self._v_tokens:
+                found.append(self._v_tokens[address])
+        try:
+            found.append(self.pool(key))
+        except (KeyError, ValueError):
+            pass
+        return list(dict.fromkeys(found))
+
+    # views
+
+    def network(self, network):
+        """Registry restricted to one network."""
+        network = network_name(network)
+        if network not in self._views:
+            self._views[network] = Registry(
+                [a for a in self.assets if a.network == network],
+                [p for p in self.pools if p.network == network],
+                [listing for listing in self.listings if listing.network == network],
+                [d for d in self.deployments if d.network == network]
+            )
+        return self._views[network]
+
+    def deployment(self, network, version):
+        """Deployment `version` (e.g. "v2") on `network`, KeyError if unknown."""
+        return self._deployments[(network_name(network), version)]
+
+    def deployment_assets(self, network, version):
+        """Assets of a deployment."""
+        deployment = self.deployment(network, version)
+        return tuple(self._assets[(deployment.network, address)] for address in deployment.assets)
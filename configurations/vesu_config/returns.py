@@ -0,0 +1,60 @@
+"""
+Pair return engine.
+
+Pairwise prices are triangulated via USD, p(A/B) = p(A/USD) / p(B/USD), so the log return of a pair is simply the difference of the two
+per-asset log returns. Only the per-asset (T x n) log return matrix is kept; pair returns are derived on the fly for the pairs that are
+actually requested, so memory and time grow with the number of configured pairs rather than with n².
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+def log_returns(prices):
+    """Per-asset daily log returns of a date indexed price DataFrame (one column per asset) or `vesu_config.store.PriceMatrix`."""
+    if hasattr(prices, 'log_returns'):
+        return prices.log_returns()
+    return np.log(prices).diff()
+
+
+def pair_index(columns, pairs):
+    """Column positions of the (collateral, debt) assets of every pair in `pairs`."""
+    position = {name: i for i, name in enumerate(columns)}
+    missing = sorted({name for pair in pairs for name in pair if name not in position})
+    if missing:
+        raise KeyError(f'No price data for {", ".join(missing)}')
+    collateral = np.fromiter((position[c] for c, _ in pairs), dtype=np.intp, count=len(pairs))
+    debt = np.fromiter((position[d] for _, d in pairs), dtype=np.intp, count=len(pairs))
+    return collateral, debt
+
+
+def pair_returns(returns, pairs):
+    """(T x len(pairs)) log returns of the collateral asset denominated in the debt asset."""
+    collateral, debt = pair_index(returns.columns, pairs)
+    values = returns.to_numpy()
+    return values[:, collateral] - values[:, debt]
+
+
+def pair_volatility(returns, pairs, chunk_size=4096):
+    """
+    Worst-case daily volatility, i.e. the maximal daily price decline (negative log-return), of the collateral asset denominated in the
+    debt asset for every (collateral, debt) pair in `pairs`.
+
+    Pairs are processed in chunks so that at most (T x chunk_size) pair returns are materialized at any time. Returns a Series indexed by
+    (collateral, debt) tuples.
+    """
+    pairs = list(dict.fromkeys(map(tuple, pairs)))
+    collateral, debt = pair_index(returns.columns, pairs)
+    values = returns.to_numpy()
+
+    worst = np.empty(len(pairs))
+    with warnings.catch_warnings():
+        # pairs without any overlapping history yield NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for start in range(0, len(pairs), chunk_size):
+            end = start + chunk_size
+            worst[start:end] = np.nanmin(values[:, collateral[start:end]] - values[:, debt[start:end]], axis=0)
+
+    return pd.Series(np.abs(worst), index=pd.MultiIndex.from_tuples(pairs) if pairs else None)
@@ -0,0 +1,182 @@
+"""
+Monte Carlo liquidation-loss simulation.
+
+Estimates the bad debt a pool could accrue at its configured risk parameters. For every pair a position borrowing `debt_cap` is opened at
+the pair's `max_ltv`. The price of the collateral denominated in the debt asset then follows simulated daily paths, either log-normal with
+the drift and volatility of the pair's historical log returns or bootstrapped from those returns.
+
+Whenever a position is above its `max_ltv` it is liquidated at the pair's `liquidation_discount`. Liquidators can only sell as much
+collateral per day as the DEX liquidity at a price impact of the liquidation bonus allows. Debt that remains once all collateral is seized,
+or that is not covered by the collateral at the end of the horizon, is bad debt.
+
+Paths are simulated in NumPy batches of (paths x pairs) and sharded across a process pool. The return history is shared with the workers
+as a read-only memory map. Shards only return sums and a histogram of the loss as a fraction of the debt cap, so results merge exactly and
+tail statistics are resolved to 1/`bins` of the debt cap.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .liquidity import liquidation_depth, lookup_liquidity
+from .returns import pair_returns
+from .store import attach, mapped
+
+METHODS = ("lognormal", "bootstrap")
+
+# calibrated inputs shared with the worker processes, set once per worker by `_init_worker`
+_shared = {}
+
+
+def calibrate(pair_parameters, returns, liquidity):
+    """Per-pair inputs of the simulation: risk parameters, liquidity and the historical pair log returns."""
+    pairs = [(p["collateral_asset_name"], p["debt_asset_name"]) for p in pair_parameters]
+    history = pair_returns(returns, pairs)
+    valid = ~np.isnan(history)
+
+    # valid returns of every pair moved to the front of its column, for bootstrapping
+    counts = valid.sum(axis=0)
+    order = np.argsort(~valid, axis=0, kind='stable')
+    packed = np.take_along_axis(history, order, axis=0)
+
+    discount = np.array([p["liquidation_discount"] for p in pair_parameters], dtype=float)
+    return {
+        "pairs": pairs,
+        "max_ltv": np.array([p["max_ltv"] for p in pair_parameters], dtype=float),
+        "liquidation_discount": discount,
+        "debt_cap": np.array([p["debt_cap"] for p in pair_parameters], dtype=float),
+        "liquidity": lookup_liquidity(liquidity, [d for _, d in pairs], [c for c, _ in pairs], liquidation_depth(discount)),
+        "mu": np.nanmean(history, axis=0),
+        "sigma": np.nanstd(history, axis=0, ddof=1),
+        "history": packed,
+        "counts": counts
+    }
+
+
+def _draw_returns(inputs, rng, n_paths, method):
+    n_pairs = len(inputs["pairs"])
+    if method == "lognormal":
+        return rng.normal(inputs["mu"], inputs["sigma"], (n_paths, n_pairs))
+    rows = (rng.random((n_paths, n_pairs)) * inputs["counts"]).astype(np.intp)
+    return inputs["history"][rows, np.arange(n_pairs)]
+
+
+def simulate_batch(inputs, n_paths, horizon, method, rng):
+    """Bad debt of `n_paths` simulated positions per pair over `horizon` days, shape (n_paths, pairs)."""
+    max_ltv, discount, liquidity = inputs["max_ltv"], inputs["liquidation_discount"], inputs["liquidity"]
+    shape = (n_paths, len(inputs["pairs"]))
+
+    debt = np.broadcast_to(inputs["debt_cap"], shape).copy()
+    quantity = debt / max_ltv # collateral at a price of 1, opened at max_ltv
+    log_price = np.zeros(shape)
+    bad_debt = np.zeros(shape)
+    value, repay, seized = np.empty(shape), np.empty(shape), np.empty(shape)
+
+    for _ in range(horizon):
+        log_price += _draw_returns(inputs, rng, n_paths, method)
+        price = np.exp(log_price)
+        np.multiply(quantity, price, out=value)
+
+        # liquidate unhealthy positions, limited by the liquidity available at the liquidation bonus
+        np.minimum(debt, liquidity, out=repay)
+        repay[debt <= max_ltv * value] = 0.0
+        np.divide(repay, discount, out=seized)
+
+        # once the collateral is exhausted, the debt that is left has no collateral and becomes bad debt
+        exhausted = seized >= value
+        np.copyto(repay, value * discount, where=exhausted)
+        np.copyto(seized, value, where=exhausted)
+        quantity -= seized / price
+        debt -= repay
+        bad_debt[exhausted] += debt[exhausted]
+        debt[exhausted] = 0.0
+
+    return bad_debt + np.maximum(debt - quantity * np.exp(log_price), 0.0)
+
+
+def _simulate_shard(inputs, n_paths, horizon, method, seed, batch_size, bins):
+    rng = np.random.default_rng(seed)
+    n_pairs = len(inputs["pairs"])
+    total = np.zeros(n_pairs)
+    hits = np.zeros(n_pairs, dtype=np.int64)
+    # bin 0 holds paths without bad debt, bin k > 0 losses in ((k-1)/bins, k/bins] of the debt cap
+    histogram = np.zeros(n_pairs * (bins + 1), dtype=np.int64)
+    offsets = np.arange(n_pairs) * (bins + 1)
+    for start in range(0, n_paths, batch_size):
+        loss = simulate_batch(inputs, min(batch_size, n_paths - start), horizon, method, rng)
+        total += loss.sum(axis=0)
+        hits += (loss > 0).sum(axis=0)
+        fraction = np.clip(loss / inputs["debt_cap"], 0, 1)
+        index = np.where(fraction > 0, np.minimum(np.ceil(fraction * bins).astype(np.intp), bins), 0) + offsets
+        histogram += np.bincount(index.ravel(), minlength=n_pairs * (bins + 1))
+    return total, hits, histogram.reshape(n_pairs, bins + 1)
+
+
+def _init_worker(inputs):
+    _shared["inputs"] = attach(inputs)
+
+
+def _simulate_shard_worker(args):
+    return _simulate_shard(_shared["inputs"], *args)
+
+
+def _tail(histogram, n_paths, debt_cap, quantile):
+    # value at risk and expected shortfall over the worst ceil((1 - quantile) * n_paths) losses, resolved to the upper edge of their bin
+    bins = histogram.shape[1] - 1
+    edges = np.arange(bins + 1) / bins
+    n_tail = max(int(np.ceil(round((1 - quantile) * n_paths, 9))), 1)
+    # paths taken from every bin, worst bin first; the bin holding the n_tail-th worst loss contributes only the remaining count
+    descending = histogram[:, ::-1]
+    before = np.cumsum(descending, axis=1) - descending
+    taken = np.clip(n_tail - before, 0, descending)
+    var_bin = bins - np.argmax(before + descending >= n_tail, axis=1)
+    cvar = (taken * edges[::-1]).sum(axis=1) / n_tail
+    return edges[var_bin] * debt_cap, cvar * debt_cap
+
+
+def simulate(pair_parameters, returns, liquidity, n_paths=100000, horizon=10, method="lognormal", quantile=0.99, workers=None,
+             batch_size=20000, bins=10000, seed=0):
+    """
+    Simulate `n_paths` liquidation paths of `horizon` days for every pair of a configured pool.
+
+    `pair_parameters` must contain `max_ltv`, `returns` are the per-asset log returns and `liquidity` the liquidity curves. Returns a
+    DataFrame indexed by (collateral, debt) with the probability of bad debt, the expected bad debt and the bad debt at risk / expected
+    shortfall at `quantile`, also as fractions of the debt cap.
+    """
+    if method not in METHODS:
+        raise ValueError(f'Unknown method {method}, expected one of {METHODS}')
+    inputs = calibrate(pair_parameters, returns, liquidity)
+    missing = [pair for pair, liq, count in zip(inputs["pairs"], inputs["liquidity"], inputs["counts"]) if np.isnan(liq) or count < 2]
+    if missing:
+        raise ValueError(f'No liquidity or return history for {missing}')
+
+    # split the paths into shards with independent random streams
+    workers = workers or os.cpu_count() or 1
+    n_shards = max(1, min(workers, -(-n_paths // batch_size)))
+    sizes = np.diff(np.linspace(0, n_paths, n_shards + 1).astype(int))
+    seeds = np.random.SeedSequence(seed).spawn(n_shards)
+    tasks = [(int(size), horizon, method, s, batch_size, bins) for size, s in zip(sizes, seeds)]
+
+    if n_shards == 1:
+        results = [_simulate_shard(inputs, *task) for task in tasks]
+    else:
+        with mapped(inputs) as handles, \
+                ProcessPoolExecutor(max_workers=n_shards, initializer=_init_worker, initargs=(handles,)) as pool:
+            results = list(pool.map(_simulate_shard_worker, tasks))
+
+    total = sum(r[0] for r in results)
+    hits = sum(r[1] for r in results)
+    histogram = sum(r[2] for r in results)
+    debt_cap = inputs["debt_cap"]
+    var, cvar = _tail(histogram, n_paths, debt_cap, quantile)
+
+    return pd.DataFrame({
+        "prob_bad_debt": hits / n_paths,
+        "expected_bad_debt": total / n_paths,
+        "bad_debt_at_risk": var,
+        "expected_shortfall": cvar,
+        "expected_bad_debt_fraction": total / n_paths / debt_cap,
+        "bad_debt_at_risk_fraction": var / debt_cap
+    }, index=pd.MultiIndex.from_tuples(inputs["pairs"], names=["collateral_asset_name", "debt_asset_name"]))
@@ -0,0 +1,64 @@
+"""
+Pool specs.
+
+A pool spec holds the input parameters of one pool (see `vesu_config.batch`). This module only depends on the standard library so that
+specs can be loaded and checked without importing the numerical stack.
+"""
+
+import copy
+import json
+
+REQUIRED_KEYS = ["output", "pool_parameters", "asset_parameters", "pair_parameters"]
+REQUIRED_PAIR_KEYS = ["debt_asset_name", "collateral_asset_name", "liquidation_discount", "risk_level_factor", "debt_cap"]
+
+
+def load_spec(spec):
+    """Load a pool spec from a path, or return a copy of an already loaded spec."""
+    if isinstance(spec, dict):
+        return copy.deepcopy(spec)
+    with open(spec) as infile:
+        return json.load(infile)
+
+
+def check_spec(spec, registry=None):
+    """
+    Return a list of problems with the structure of `spec`, empty if it can be generated.
+
+    With a `vesu_config.registry.Registry`, the token addresses and decimals are also checked against the known assets of the spec's
+    network (taken from its "network" key or its output file name).
+    """
+    problems = [f'missing "{key}"' for key in REQUIRED_KEYS if key not in spec]
+    if problems:
+        return problems
+
+    assets = {a.get("asset_name") for a in spec["asset_parameters"]}
+    for i, a in enumerate(spec["asset_parameters"]):
+        if "asset_name" not in a or "address" not in a.get("token", {}):
+            problems.append(f'asset {i}: missing "asset_name" or "token.address"')
+    for i, p in enumerate(spec["pair_parameters"]):
+        problems += [f'pair {i}: missing "{key}"' for key in REQUIRED_PAIR_KEYS if key not in p]
+        for key in ["debt_asset_name", "collateral_asset_name"]:
+            if key in p and p[key] not in assets:
+                problems.append(f'pair {i}: {key} "{p[key]}" is not a listed asset')
+    if registry is not None and not problems:
+        problems += _check_tokens(spec, registry)
+    return problems
+
+
+def _check_tokens(spec, registry):
+    from .registry import network_name
+    try:
+        network = network_name(spec.get("network") or spec["output"])
+    except ValueError:
+        return [f'unknown network of "{spec["output"]}"']
+    problems = []
+    for i, a in enumerate(spec["asset_parameters"]):
+        token = a["token"]
+        try:
+            known = registry.asset(token["address"], network)
+        except KeyError:
+            problems.append(f'asset {i}: {token["address"]} is not a known {network} asset')
+            continue
+        if known.decimals is not None and token.get("decimals", known.decimals) != known.decimals:
+            problems.append(f'asset {i}: token decimals {token["decimals"]} differ from the registry ({known.decimals})')
+    return problems
@@ -0,0 +1,183 @@
+"""
+Compact price and return store.
+
+`PriceMatrix` keeps the daily prices (or log returns) of a universe as one contiguous (days x assets) float32 or float64 array with an int32
+day index (days since 1970-01-01) and a listed mask. Assets listed later, like STRK, are NaN before their first price and `listed` marks
+the days on which an asset has data.
+
+The store exposes the parts of the DataFrame interface the pipeline stages use (`columns`, `index`, `to_numpy`, `len`), so the return,
+volatility, LTV and simulation stages work on it directly without building wide DataFrames.
+
+    prices = PriceMatrix.from_frame(fetch_all_prices(coins), dtype=np.float32)
+    returns = log_returns(prices.window('2022-01-01', '2024-04-30'))
+    volatility = pair_volatility(returns, pairs)
+
+Stores can be saved as `.npy` files and loaded memory-mapped. Worker processes share large arrays through `mapped`: the parent writes each
+array once to a `.npy` file and sends only its path, every worker maps the file read-only with `attach`. N workers then share one copy in
+the page cache and start without a pickle round-trip of the data.
+"""
+
+import json
+import shutil
+import tempfile
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def to_days(dates):
+    """int32 days since 1970-01-01 of dates (strings, datetimes or a DatetimeIndex)."""
+    return (np.asarray(pd.to_datetime(dates), dtype='datetime64[D]') - EPOCH).astype(np.int32)
+
+
+class PriceMatrix:
+    """Daily values of a set of assets: `values[t, j]` is the value of `columns[j]` on day `days[t]`."""
+
+    def __init__(self, values, days, columns):
+        self.values = np.ascontiguousarray(values)
+        if self.values.dtype not in (np.float32, np.float64):
+            self.values = self.values.astype(np.float64)
+        self.days = np.asarray(days, dtype=np.int32)
+        self.columns = pd.Index(columns)
+        if self.values.shape != (len(self.days), len(self.columns)):
+            raise ValueError(f'values of shape {self.values.shape} do not match {len(self.days)} days and {len(self.columns)} columns')
+
+    @classmethod
+    def from_frame(cls, frame, dtype=np.float64):
+        """Store of a date indexed DataFrame with one column per asset."""
+        return cls(frame.to_numpy(dtype=dtype), to_days(frame.index), frame.columns)
+
+    @classmethod
+    def from_series(cls, series, dtype=np.float64):
+        """
+        Store of a dict of per-asset date indexed Series, aligned on the union of their days.
+
+        Values are scattered straight into the (days x assets) array, so no intermediate outer-joined DataFrame is built.
+        """
+        days = {name: to_days(s.index) for name, s in series.items()}
+        all_days = np.unique(np.concatenate(list(days.values()))) if days else np.array([], dtype=np.int32)
+        values = np.full((len(all_days), len(series)), np.nan, dtype=dtype)
+        for j, (name, s) in enumerate(series.items()):
+            values[np.searchsorted(all_days, days[name]), j] = s.to_numpy(dtype=dtype)
+        return cls(values, all_days, list(series))
+
+    def __len__(self):
+        return len(self.days)
+
+    def __repr__(self):
+        return f'PriceMatrix({len(self.days)} days x {len(self.columns)} assets, {self.values.dtype})'
+
+    @property
+    def index(self):
+        """Dates of the rows as a DatetimeIndex."""
+        return pd.DatetimeIndex(EPOCH + self.days.astype('timedelta64[D]'), name='date')
+
+    @property
+    def listed(self):
+        """Boolean (days x assets) mask of the values that are available."""
+        return ~np.isnan(self.values)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.days.nbytes
+
+    def to_numpy(self, dtype=None):
+        return self.values if dtype is None else self.values.astype(dtype, copy=False)
+
+    def to_frame(self):
+        return pd.DataFrame(self.values, index=self.index, columns=self.columns)
+
+    def column(self, name):
+        """Values of one asset."""
+        return self.values[:, self.columns.get_loc(name)]
+
+    def first_listed(self):
+        """Day index of the first available value of every asset, -1 for assets without data."""
+        listed = self.listed
+        return np.where(listed.any(axis=0), listed.argmax(axis=0), -1)
+
+    def window(self, start=None, end=None):
+        """Rows from `start` to `end` (inclusive, dates or None), as a view of the same array."""
+        lo = 0 if start is None else np.searchsorted(self.days, to_days([start])[0], side='left')
+        hi = len(self.days) if end is None else np.searchsorted(self.days, to_days([end])[0], side='right')
+        return PriceMatrix(self.values[lo:hi], self.days[lo:hi], self.columns)
+
+    def select(self, columns):
+        """Store restricted to `columns`, in that order."""
+        return PriceMatrix(self.values[:, self.columns.get_indexer(columns)], self.days, columns)
+
+    def save(self, directory):
+        """Write the store to `directory` as values.npy, days.npy and columns.json."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / 'values.npy', self.values)
+        np.save(directory / 'days.npy', self.days)
+        with open(directory / 'columns.json', 'w') as outfile:
+            json.dump([str(c) for c in self.columns], outfile)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Load a store written by `save`, memory-mapping the values by default."""
+        directory = Path(directory)
+        with open(directory / 'columns.json') as infile:
+            columns = json.load(infile)
+        self = cls.__new__(cls)
+        self.values = np.load(directory / 'values.npy', mmap_mode=mmap_mode)
+        self.days = np.load(directory / 'days.npy')
+        self.columns = pd.Index(columns)
+        return self
+
+    def log_returns(self):
+        """Daily log returns in the store's dtype; the first day and days after a missing price are NaN."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            logs = np.log(self.values)
+        returns = np.empty_like(logs)
+        returns[0] = np.nan
+        np.subtract(logs[1:], logs[:-1], out=returns[1:])
+        return PriceMatrix(returns, self.days, self.columns)
+
+
+def window(prices, start=None, end=None):
+    """The `start`..`end` rows of a price DataFrame or `PriceMatrix`."""
+    if isinstance(prices, PriceMatrix):
+        return prices.window(start, end)
+    return prices.loc[start:end]
+
+
+class MappedArray(namedtuple('MappedArray', 'path')):
+    """Handle of an array in a `.npy` file. Pickles as its path; `load` maps the file read-only."""
+
+    def load(self):
+        return np.load(self.path, mmap_mode='r')
+
+
+@contextmanager
+def mapped(arrays, min_bytes=2 ** 20, directory=None):
+    """
+    Write the NumPy arrays of at least `min_bytes` in the dict `arrays` to `.npy` files in a temporary directory.
+
+    Yields a copy of `arrays` in which those arrays are replaced by `MappedArray` handles, to be sent to worker processes and resolved
+    there with `attach`. The files are removed when the block exits.
+    """
+    tmp = tempfile.mkdtemp(prefix='vesu-config-', dir=directory)
+    try:
+        handles = {}
+        for key, value in arrays.items():
+            if isinstance(value, np.ndarray) and value.nbytes >= min_bytes:
+                path = str(Path(tmp) / f'{len(handles)}.npy')
+                np.save(path, value)
+                value = MappedArray(path)
+            handles[key] = value
+        yield handles
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def attach(arrays):
+    """Resolve the `MappedArray` handles in the dict `arrays` to read-only memory maps."""
+    return {key: value.load() if isinstance(value, MappedArray) else value for key, value in arrays.items()}
@@ -0,0 +1,118 @@
+"""
+Batched stress scenarios.
+
+A scenario shocks the USD prices of some assets, e.g. {"starknet": -0.4, "ethereum": -0.25}; unshocked assets keep their price. Like the
+generator, which measures every pair in USD and triangulates (collateral return minus debt return), the move of a pair is derived from
+the per-asset moves:
+
+    log(p'_pair / p_pair) = log1p(shock_collateral) - log1p(shock_debt)
+
+Positions are assumed to be opened at `utilization` x `max_ltv`. After the move their LTV is ltv' = ltv / (p'_pair / p_pair), and a pair is
+
+- liquidatable when ltv' > max_ltv,
+- shut down when shutdown_ltv is enabled (not 0) and ltv' >= shutdown_ltv,
+- in bad debt when the collateral sold at the `liquidation_discount` no longer covers the debt, ltv' > liquidation_discount, with a
+  shortfall of 1 - liquidation_discount / ltv' of the debt.
+
+The pairs of all configurations are stacked into one array, so all scenarios x all pairs are a single (S x P) array operation, and the
+per-configuration counts are segment sums over the contiguous pairs of each file.
+
+    vesu-config stress --shock starknet=-0.4 ethereum=-0.25
+"""
+
+import json
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+Stress = namedtuple('Stress', 'scenarios pairs ltv')
+
+
+def load_scenarios(path):
+    """Scenarios from a JSON file of {name: {CoinGecko id: shock}}, shocks as fractional price changes (-0.4 is a 40% drop)."""
+    with open(path) as infile:
+        return json.load(infile)
+
+
+def scenario_matrix(scenarios, assets):
+    """
+    (S x A) log price moves of `assets` under `scenarios`, given as {name: {asset: shock}} or a DataFrame of shocks with one row per
+    scenario and one column per asset. Returns (names, moves).
+    """
+    if not isinstance(scenarios, pd.DataFrame):
+        scenarios = pd.DataFrame.from_dict(scenarios, orient='index')
+    shocks = scenarios.reindex(columns=assets).fillna(0.0).to_numpy(dtype=float)
+    if np.any(shocks <= -1):
+        raise ValueError('Shocks must be greater than -1 (a price cannot fall by 100% or more)')
+    return list(scenarios.index), np.log1p(shocks)
+
+
+def historical_scenarios(prices, horizon=1):
+    """One scenario per day of `prices`: the price change of every asset over the following `horizon` days, named by the start day."""
+    shocks = prices.shift(-horizon) / prices - 1
+    return shocks.iloc[:-horizon].dropna(how='all')
+
+
+def stack_pairs(configs):
+    """Pairs of a list of (file, configuration) tuples as one DataFrame, contiguous per file."""
+    frames = []
+    for file, config in configs:
+        pairs = pd.DataFrame(config["pair_parameters"], columns=[
+            "collateral_asset_name", "debt_asset_name", "max_ltv", "liquidation_discount", "shutdown_ltv", "debt_cap"])
+        pairs.insert(0, "file", file)
+        frames.append(pairs)
+    pairs = pd.concat(frames, ignore_index=True)
+    pairs["shutdown_ltv"] = pairs["shutdown_ltv"].fillna(0.0)
+    return pairs
+
+
+def stress(configs, scenarios, utilization=1.0):
+    """
+    LTVs of every pair of `configs` (a list of (file, configuration) tuples) under every scenario, for positions opened at
+    `utilization` x `max_ltv`. Returns a `Stress` of (scenario names, pairs DataFrame, (S x P) LTV array).
+    """
+    pairs = stack_pairs(configs)
+    assets = list(dict.fromkeys(pairs["collateral_asset_name"].tolist() + pairs["debt_asset_name"].tolist()))
+    position = {name: i for i, name in enumerate(assets)}
+    collateral = pairs["collateral_asset_name"].map(position).to_numpy()
+    debt = pairs["debt_asset_name"].map(position).to_numpy()
+    names, moves = scenario_matrix(scenarios, assets)
+    pair_moves = moves[:, collateral] - moves[:, debt]
+    ltv = utilization * pairs["max_ltv"].to_numpy(dtype=float) * np.exp(-pair_moves)
+    return Stress(names, pairs, ltv)
+
+
+def summarize(result):
+    """
+    Health of every configuration under every scenario: DataFrame indexed by (scenario, file) with the number of pairs that are
+    liquidatable, shut down and in bad debt, the worst LTV relative to `max_ltv` with its pair and the worst shortfall.
+    """
+    pairs, ltv = result.pairs, result.ltv
+    max_ltv = pairs["max_ltv"].to_numpy(dtype=float)
+    shutdown_ltv = pairs["shutdown_ltv"].to_numpy(dtype=float)
+    discount = pairs["liquidation_discount"].to_numpy(dtype=float)
+    liquidatable = ltv > max_ltv
+    shutdown = (shutdown_ltv > 0) & (ltv >= shutdown_ltv)
+    shortfall = np.maximum(1 - discount / ltv, 0)
+    ratio = ltv / max_ltv
+
+    # pairs of a file are contiguous, so per-file reductions are segment reductions over the columns
+    files, starts = np.unique(pairs["file"].to_numpy(), return_index=True)
+    order = np.argsort(starts)
+    files, starts = files[order], starts[order]
+    ends = np.append(starts[1:], len(pairs))
+    worst = np.stack([ratio[:, s:e].argmax(axis=1) + s for s, e in zip(starts, ends)], axis=1)
+    labels = (pairs["collateral_asset_name"] + "/" + pairs["debt_asset_name"]).to_numpy()
+    rows = np.arange(len(ltv))[:, None]
+
+    summary = pd.DataFrame({
+        "pairs": np.broadcast_to(ends - starts, worst.shape).ravel(),
+        "liquidatable": np.add.reduceat(liquidatable, starts, axis=1).ravel(),
+        "shutdown": np.add.reduceat(shutdown, starts, axis=1).ravel(),
+        "bad_debt": np.add.reduceat(shortfall > 0, starts, axis=1).ravel(),
+        "worst_ltv_ratio": ratio[rows, worst].ravel(),
+        "worst_pair": labels[worst].ravel(),
+        "worst_shortfall": np.maximum.reduceat(shortfall, starts, axis=1).ravel()
+    }, index=pd.MultiIndex.from_product([result.scenarios, files], names=["scenario", "file"]))
+    return summary
@@ -0,0 +1,230 @@
+"""
+Pool configuration validator.
+
+The schema (required and optional fields with their kinds) and the cross-field rules are compiled once into a `Validator`. Validation
+loads every configuration, stacks each section of all files into columns (one row per pool, asset or pair) and evaluates every rule as a
+single NumPy expression over all rows of all files. All violations are reported at once.
+
+    vesu-config validate               # all configurations/config_*.json, exits with 1 on violations
+
+which also works as a git pre-commit hook.
+"""
+
+import json
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from .config import RATE_FIELDS
+
+Violation = namedtuple('Violation', 'file section entry rule message')
+Field = namedtuple('Field', 'name kind required')
+Rule = namedtuple('Rule', 'section name message fields check')
+
+KINDS = {
+    "string": lambda v: isinstance(v, str) and v != '',
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool) and v == v,
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "bool": lambda v: isinstance(v, bool),
+    "address": re.compile(r'0x[0-9a-fA-F]{1,64}').fullmatch,
+    "rate": re.compile(r'\d+(\.\d{1,18})?').fullmatch
+}
+
+SCHEMA = {
+    "pool_parameters": [
+        Field("name", "string", True),
+        Field("owner", "address", True),
+        Field("fee_recipient", "address", True),
+        Field("recovery_period", "integer", False),
+        Field("subscription_period", "integer", False)
+    ],
+    "asset_parameters": [
+        Field("asset_name", "string", True),
+        Field("token.address", "address", True),
+        Field("token.symbol", "string", True),
+        Field("token.decimals", "integer", True),
+        Field("token.is_legacy", "bool", True),
+        Field("floor", "number", True),
+        Field("max_utilization", "number", True),
+        Field("target_utilization", "number", True),
+        Field("min_target_utilization", "number", True),
+        Field("max_target_utilization", "number", True),
+        *[Field(name, "rate", True) for name in RATE_FIELDS],
+        Field("rate_half_life", "integer", True),
+        Field("target_rate_percent", "number", True),
+        Field("fee_rate", "number", True)
+    ],
+    "pair_parameters": [
+        Field("collateral_asset_name", "string", True),
+        Field("debt_asset_name", "string", True),
+        Field("collateral_asset", "address", True),
+        Field("debt_asset", "address", True),
+        Field("liquidation_discount", "number", True),
+        Field("max_ltv", "number", True),
+        Field("debt_cap", "integer", True),
+        Field("risk_level_factor", "number", False),
+        Field("shutdown_ltv", "number", False)
+    ]
+}
+
+RULES = [
+    Rule("asset_parameters", "utilization_order", "requires 0 <= min_target_utilization <= target_utilization <= max_target_utilization <= "
+         "max_utilization <= 1", ["min_target_utilization", "target_utilization", "max_target_utilization", "max_utilization"],
+         lambda c: (0 <= c["min_target_utilization"]) & (c["min_target_utilization"] <= c["target_utilization"])
+         & (c["target_utilization"] <= c["max_target_utilization"]) & (c["max_target_utilization"] <= c["max_utilization"])
+         & (c["max_utilization"] <= 1)),
+    Rule("asset_parameters", "full_utilization_rate_order",
+         "requires min_full_utilization_rate <= initial_full_utilization_rate <= max_full_utilization_rate", RATE_FIELDS[:3],
+         lambda c: (c["min_full_utilization_rate"] <= c["initial_full_utilization_rate"])
+         & (c["initial_full_utilization_rate"] <= c["max_full_utilization_rate"])),
+    Rule("asset_parameters", "fee_rate", "fee_rate must be within [0, 1]", ["fee_rate"],
+         lambda c: (0 <= c["fee_rate"]) & (c["fee_rate"] <= 1)),
+    Rule("asset_parameters", "target_rate_percent", "target_rate_percent must be within [0, 1]", ["target_rate_percent"],
+         lambda c: (0 <= c["target_rate_percent"]) & (c["target_rate_percent"] <= 1)),
+    Rule("asset_parameters", "decimals", "token.decimals must be within [0, 255]", ["token.decimals"],
+         lambda c: (0 <= c["token.decimals"]) & (c["token.decimals"] <= 255)),
+    Rule("pair_parameters", "max_ltv", "max_ltv must be within (0, 1)", ["max_ltv"],
+         lambda c: (0 < c["max_ltv"]) & (c["max_ltv"] < 1)),
+    Rule("pair_parameters", "shutdown_ltv", "shutdown_ltv must be 0 (disabled) or within [max_ltv, 1]", ["max_ltv", "shutdown_ltv"],
+         lambda c: (c["shutdown_ltv"] == 0) | ((c["max_ltv"] <= c["shutdown_ltv"]) & (c["shutdown_ltv"] <= 1))),
+    Rule("pair_parameters", "liquidation_discount", "liquidation_discount must be within (0, 1]", ["liquidation_discount"],
+         lambda c: (0 < c["liquidation_discount"]) & (c["liquidation_discount"] <= 1)),
+    Rule("pair_parameters", "debt_cap", "debt_cap must not be negative", ["debt_cap"],
+         lambda c: c["debt_cap"] >= 0),
+    Rule("pair_parameters", "distinct_assets", "collateral and debt asset must differ", ["collateral_asset", "debt_asset"],
+         lambda c: c["collateral_asset"] != c["debt_asset"])
+]
+
+
+def _flatten(value, prefix=''):
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(_flatten(item, f'{prefix}{key}.'))
+        return flat
+    return {prefix[:-1]: value}
+
+
+def _as_number(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return np.nan
+
+
+def _address_key(value):
+    return int(value, 16) if isinstance(value, str) and KINDS["address"](value) else value
+
+
+class Validator:
+    """Schema and rules compiled once; `validate` applies them to any number of configurations."""
+
+    def __init__(self, schema=SCHEMA, rules=RULES):
+        self.schema = {section: [(f, KINDS[f.kind]) for f in fields] for section, fields in schema.items()}
+        self.kinds = {section: {f.name: f.kind for f in fields} for section, fields in schema.items()}
+        self.rules = {section: [r for r in rules if r.section == section] for section in schema}
+
+    def _columns(self, configs, section):
+        # one row per entry of `section` across all configs; addresses become integers, numbers and rates floats (NaN if malformed)
+        rows, files, labels = [], [], []
+        for file, config in configs:
+            entries = config.get(section, [])
+            for i, entry in enumerate([entries] if isinstance(entries, dict) else entries):
+                rows.append(_flatten(entry))
+                files.append(file)
+                labels.append(_label(section, entry, i))
+        columns = {}
+        for name, kind in self.kinds[section].items():
+            values = [row.get(name) for row in rows]
+            if kind in ("number", "integer", "rate"):
+                columns[name] = np.array([_as_number(v) if v is not None else np.nan for v in values], dtype=float)
+            elif kind == "address":
+                columns[name] = np.array([_address_key(v) for v in values], dtype=object)
+            else:
+                columns[name] = np.array(values, dtype=object)
+        return rows, np.array(files, dtype=object), labels, columns
+
+    def validate(self, configs):
+        """Violations of a list of (file, configuration) tuples."""
+        violations = []
+        names = {}
+        for section in self.schema:
+            rows, files, labels, columns = self._columns(configs, section)
+
+            # schema
+            for field, check in self.schema[section]:
+                for i, row in enumerate(rows):
+                    if field.name not in row:
+                        if field.required:
+                            violations.append(Violation(files[i], section, labels[i], 'schema', f'missing {field.name}'))
+                    elif not check(row[field.name]):
+                        violations.append(Violation(files[i], section, labels[i], 'schema',
+                                                    f'{field.name} {row[field.name]!r} is not a valid {field.kind}'))
+
+            # cross-field rules, skipping rows where a field is missing or malformed
+            for rule in self.rules[section]:
+                present = np.ones(len(rows), dtype=bool)
+                for name in rule.fields:
+                    column = columns[name]
+                    present &= ~np.isnan(column) if column.dtype == float else np.array([v is not None for v in column], dtype=bool)
+                with np.errstate(invalid='ignore'):
+                    failed = present & ~np.asarray(rule.check(columns), dtype=bool)
+                violations += [Violation(files[i], section, labels[i], rule.name, rule.message) for i in np.flatnonzero(failed)]
+
+            names[section] = (files, columns)
+
+        violations += _references(names)
+        return violations
+
+
+def _label(section, entry, i):
+    if section == "pool_parameters":
+        return entry.get("name", "pool")
+    if section == "asset_parameters":
+        return entry.get("asset_name", f'asset {i}')
+    return f'{entry.get("collateral_asset_name", "?")}/{entry.get("debt_asset_name", "?")}'
+
+
+def _references(names):
+    # every pair must reference assets listed in its own file, by name and by address, and appear once per file
+    asset_files, assets = names["asset_parameters"]
+    pair_files, pairs = names["pair_parameters"]
+    violations = []
+    listed = dict(zip(zip(asset_files, assets["asset_name"]), assets["token.address"]))
+    seen = set()
+    labels = [f'{c}/{d}' for c, d in zip(pairs["collateral_asset_name"], pairs["debt_asset_name"])]
+    for i, (file, label) in enumerate(zip(pair_files, labels)):
+        for side in ["collateral", "debt"]:
+            name, address = pairs[f'{side}_asset_name'][i], pairs[f'{side}_asset'][i]
+            if (file, name) not in listed:
+                violations.append(Violation(file, "pair_parameters", label, 'listed_asset', f'{side} asset {name} is not listed'))
+            elif address is not None and listed[(file, name)] != address:
+                violations.append(Violation(file, "pair_parameters", label, 'listed_asset',
+                                            f'{side}_asset does not match the token address of {name}'))
+        if (file, label) in seen:
+            violations.append(Violation(file, "pair_parameters", label, 'duplicate', 'pair is configured twice'))
+        seen.add((file, label))
+    addresses = set()
+    for file, name, address in zip(asset_files, assets["asset_name"], assets["token.address"]):
+        if address is not None and (file, address) in addresses:
+            violations.append(Violation(file, "asset_parameters", name, 'duplicate', 'token address is listed twice'))
+        addresses.add((file, address))
+    return violations
+
+
+def validate_files(paths, validator=None):
+    """Violations of the configuration files at `paths`."""
+    configs = []
+    for path in paths:
+        with open(path) as infile:
+            configs.append((str(path), json.load(infile)))
+    return (validator or Validator()).validate(configs)
+
+
+def format_violations(violations):
+    return '\n'.join(f'{v.file}: {v.section} {v.entry}: [{v.rule}] {v.message}' for v in violations)
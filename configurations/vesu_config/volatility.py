@@ -0,0 +1,130 @@
+"""
+Rolling worst-case volatility.
+
+The notebook uses the all-time maximal daily price decline of a pair. Here the maximal decline is tracked over rolling windows (e.g.
+90/180/365 days) so that the drift of the Max LTVs over time can be followed:
+
+- `rolling_volatility` computes the full rolling history of all pairs at once. Rolling minima are computed with the van Herk/Gil-Werman
+  block algorithm, which is O(T) per pair like a monotonic deque but vectorizes across pairs.
+- `IncrementalVolatility` keeps a monotonic deque per pair and window and updates the current values in O(1) amortized time when a new
+  day of prices is appended, without rescanning the history.
+
+Missing returns (e.g. before an asset was listed) are ignored. A window without any return yields NaN.
+"""
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .returns import pair_index
+
+WINDOWS = (90, 180, 365)
+
+
+def rolling_min(values, window):
+    """Rolling minimum over the last `window` rows of a (T x P) array, ignoring NaNs. Leading rows use the rows available so far."""
+    values = np.where(np.isnan(values), np.inf, values)
+    T, P = values.shape
+
+    # pad in front so every row has a full window, and at the back to a whole number of blocks
+    padded_len = -(-(T + window - 1) // window) * window
+    padded = np.full((padded_len, P), np.inf)
+    padded[window - 1:window - 1 + T] = values
+    blocks = padded.reshape(-1, window, P)
+
+    # prefix minima from the left and suffix minima from the right within each block
+    prefix = np.minimum.accumulate(blocks, axis=1).reshape(padded_len, P)
+    suffix = np.minimum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(padded_len, P)
+
+    # the window ending at row t starts at padded row t and ends at padded row t + window - 1
+    result = np.minimum(suffix[:T], prefix[window - 1:window - 1 + T])
+    result[np.isinf(result)] = np.nan
+    return result
+
+
+def rolling_volatility(returns, pairs, window):
+    """
+    Rolling worst-case volatility (maximal daily decline over the last `window` days) of every (collateral, debt) pair.
+
+    Returns a DataFrame with the index of `returns` and one column per pair.
+    """
+    pairs = list(dict.fromkeys(map(tuple, pairs)))
+    collateral, debt = pair_index(returns.columns, pairs)
+    values = returns.to_numpy()
+    worst = rolling_min(values[:, collateral] - values[:, debt], window)
+    return pd.DataFrame(np.abs(worst), index=returns.index, columns=pd.MultiIndex.from_tuples(pairs))
+
+
+class IncrementalVolatility:
+    """
+    Worst-case volatility of a set of pairs over rolling windows, updated one day at a time.
+
+    Every (window, pair) keeps a monotonic deque of (day, return) entries with increasing returns, so the front always holds the
+    window's minimum. Appending a day pops dominated and expired entries only.
+    """
+
+    def __init__(self, columns, pairs, windows=WINDOWS):
+        self.columns = list(columns)
+        self.pairs = list(dict.fromkeys(map(tuple, pairs)))
+        self.collateral, self.debt = pair_index(self.columns, self.pairs)
+        self.windows = tuple(windows)
+        self.deques = {w: [deque() for _ in self.pairs] for w in self.windows}
+        self.last_prices = np.full(len(self.columns), np.nan)
+        self.day = 0
+
+    @classmethod
+    def from_prices(cls, prices, pairs, windows=WINDOWS):
+        """Initialize from a price history; deques are seeded from the tail of the history in one vectorized pass."""
+        self = cls(prices.columns, pairs, windows)
+        values = prices.to_numpy(dtype=float)
+        returns = np.diff(np.log(values), axis=0)
+        pair_returns = returns[:, self.collateral] - returns[:, self.debt]
+        self.day = len(pair_returns)
+        self.last_prices = pd.DataFrame(values).ffill().to_numpy()[-1] if len(values) else self.last_prices
+
+        for w in self.windows:
+            tail = pair_returns[-w:]
+            first_day = self.day - len(tail)
+            # an entry stays in the deque iff it is strictly smaller than every later entry of the window
+            filled = np.where(np.isnan(tail), np.inf, tail)
+            later = np.full_like(filled, np.inf)
+            later[:-1] = np.minimum.accumulate(filled[::-1], axis=0)[::-1][1:]
+            keep = filled < later
+            for j, dq in enumerate(self.deques[w]):
+                rows = np.flatnonzero(keep[:, j])
+                dq.extend(zip((first_day + rows).tolist(), tail[rows, j].tolist()))
+        return self
+
+    def append(self, prices_row):
+        """
+        Append one day of prices (one value per column, NaN if unavailable) and update all windows. An asset without a price keeps its
+        last known price, so its move over the gap counts on the day it is priced again.
+        """
+        prices_row = np.asarray(prices_row, dtype=float)
+        asset_returns = np.log(prices_row / self.last_prices)
+        pair_returns = asset_returns[self.collateral] - asset_returns[self.debt]
+        self.last_prices = np.where(np.isnan(prices_row), self.last_prices, prices_row)
+
+        day = self.day
+        for w in self.windows:
+            expired = day - w
+            for dq, value in zip(self.deques[w], pair_returns.tolist()):
+                if value == value: # not NaN
+                    while dq and dq[-1][1] >= value:
+                        dq.pop()
+                    dq.append((day, value))
+                while dq and dq[0][0] <= expired:
+                    dq.popleft()
+        self.day = day + 1
+
+    def extend(self, prices):
+        """Append several days of prices (a DataFrame with the same columns, or a 2D array)."""
+        rows = prices[self.columns].to_numpy(dtype=float) if isinstance(prices, pd.DataFrame) else np.asarray(prices, dtype=float)
+        for row in rows:
+            self.append(row)
+
+    def volatility(self):
+        """Current worst-case volatility as a DataFrame indexed by pair with one column per window."""
+        data = {w: [abs(dq[0][1]) if dq else np.nan for dq in self.deques[w]] for w in self.windows}
+        return pd.DataFrame(data, index=pd.MultiIndex.from_tuples(self.pairs))
@@ -0,0 +1,257 @@
+"""
+Watch mode: recalibrate pool configurations as new market data arrives.
+
+A `Watcher` holds the volatility of every configured pair and the liquidity curves in memory. New data comes from two sources:
+
+- JSON files dropped into a directory, picked up on every poll and moved to `<drop_dir>/processed` (or to `<drop_dir>/rejected`, with
+  an error message, when malformed):
+  `*.prices.json` with `{"date": "2024-05-01", "prices": {"ethereum": 3012.5, ...}}` (or a list of those) pricing every asset, and
+  `*.liquidity.json` with a list of liquidity rows that replace the rows of the same (debt, collateral, depth).
+- optionally a scheduled fetch of the completed days after the last known day.
+
+Each new day is appended incrementally: the worst-case volatility of a pair is updated from the day's return only, so nothing is
+rescanned. Only pairs whose volatility or liquidity curve changed get their Max LTV recomputed. When any `max_ltv` of a pool moves by
+more than `threshold` from the last written configuration, the configuration is regenerated and written together with a change report
+(`<output>.changes.json`, see `vesu_config.diff`). On startup only configurations that differ from the files on disk are written.
+Between polls the process sleeps, so it uses no CPU while idle.
+
+    vesu-config watch specs/*.json --drop-dir drop --out-dir . --threshold 0.01
+"""
+
+import copy
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .batch import build_pool, spec_liquidity, spec_pairs
+from .config import write_config
+from .diff import diff_configs, format_changes, to_records
+from .liquidity import liquidity_table
+from .ltv import compute_ltvs
+from .returns import log_returns, pair_index, pair_volatility
+from .spec import load_spec
+from .volatility import IncrementalVolatility
+
+
+class Watcher:
+    """
+    In-memory state of the watched pools.
+
+    `prices` is the price history (a DataFrame with one column per CoinGecko id). With `window`, pair volatility is the worst decline
+    over the last `window` days (see `IncrementalVolatility`), otherwise over the whole history like the generator.
+    """
+
+    def __init__(self, specs, prices, liquidity_data=(), out_dir='.', threshold=0.01, window=None):
+        self.specs = [load_spec(spec) for spec in specs]
+        self.out_dir = Path(out_dir)
+        self.threshold = threshold
+        self.window = window
+        self.pairs = spec_pairs(self.specs)
+        self.columns = list(prices.columns)
+        self.collateral, self.debt = pair_index(self.columns, self.pairs)
+        self.last_day = prices.index.max()
+
+        if window is None:
+            self.worst = pair_volatility(log_returns(prices), self.pairs).reindex(pd.MultiIndex.from_tuples(self.pairs)).to_numpy()
+            self.last_prices = prices.ffill().iloc[-1].to_numpy(dtype=float)
+        else:
+            self.incremental = IncrementalVolatility.from_prices(prices, self.pairs, windows=(window,))
+            self.worst = self.incremental.volatility()[window].to_numpy()
+
+        self.liquidity_rows = {_liquidity_key(r): r for r in spec_liquidity(self.specs, liquidity_data)}
+        self.liquidity = liquidity_table(list(self.liquidity_rows.values()))
+        self.published = {}
+        self.current = {}
+        for spec in self.specs:
+            config = self._generate(spec)
+            self.current[spec["output"]] = {(p["collateral_asset_name"], p["debt_asset_name"]): p["max_ltv"] for p in config["pair_parameters"]}
+            self._publish_initial(spec, config)
+
+    def volatility(self):
+        """Current worst-case volatility of every pair as a Series indexed by (collateral, debt)."""
+        return pd.Series(self.worst, index=pd.MultiIndex.from_tuples(self.pairs))
+
+    def _generate(self, spec):
+        return build_pool(copy.deepcopy(spec), self.volatility(), self.liquidity)
+
+    def _publish(self, spec, config, changes=None):
+        path = self.out_dir / spec["output"]
+        write_config(config, path)
+        if changes is not None:
+            with open(path.with_suffix('.changes.json'), 'w') as outfile:
+                json.dump(to_records(changes), outfile, indent=2)
+        self.published[spec["output"]] = config
+        return path
+
+    def _publish_initial(self, spec, config):
+        # configurations already on disk are only rewritten (with a change report) when their parameters differ
+        path = self.out_dir / spec["output"]
+        if not path.exists():
+            return self._publish(spec, config)
+        with open(path) as infile:
+            changes = diff_configs(json.load(infile), config, file=spec["output"])
+        if changes:
+            return self._publish(spec, config, changes)
+        self.published[spec["output"]] = config
+        return None
+
+    def _listed(self):
+        # assets with a known price, every new day must price all of them
+        return ~np.isnan(self.last_prices if self.window is None else self.incremental.last_prices)
+
+    def _row(self, date, prices, listed):
+        row = np.array([prices.get(c, np.nan) for c in self.columns], dtype=float)
+        missing = [c for c, m in zip(self.columns, listed & np.isnan(row)) if m]
+        if missing:
+            raise ValueError(f'No price for {", ".join(missing)} on {pd.Timestamp(date).date()}')
+        return row
+
+    def append_day(self, date, prices):
+        """
+        Append one day of prices (a dict of CoinGecko id to price); returns the indices of the pairs whose volatility changed. A day
+        that lacks the price of an asset with a known price raises a `ValueError`, as its moves would otherwise be lost.
+        """
+        date = pd.Timestamp(date)
+        if date <= self.last_day:
+            return np.array([], dtype=np.intp)
+        row = self._row(date, prices, self._listed())
+        before = self.worst.copy()
+        if self.window is None:
+            asset_returns = np.log(row / self.last_prices)
+            declines = -(asset_returns[self.collateral] - asset_returns[self.debt])
+            self.worst = np.fmax(self.worst, declines)
+            self.last_prices = row
+        else:
+            self.incremental.append(row)
+            self.worst = self.incremental.volatility()[self.window].to_numpy()
+        self.last_day = date
+        return np.flatnonzero(~((before == self.worst) | (np.isnan(before) & np.isnan(self.worst))))
+
+    def update_liquidity(self, rows):
+        """Merge liquidity rows; returns the indices of the pairs whose liquidity curve changed."""
+        old = self.liquidity
+        for r in rows:
+            self.liquidity_rows[_liquidity_key(r)] = r
+        self.liquidity = liquidity_table(list(self.liquidity_rows.values()))
+        changed = []
+        for i, (collateral, debt) in enumerate(self.pairs):
+            a, b = old.rows.get((debt, collateral)), self.liquidity.rows.get((debt, collateral))
+            if (a is None) != (b is None) or not np.array_equal(old.depths, self.liquidity.depths) or \
+                    (a is not None and not np.array_equal(old.values[a], self.liquidity.values[b])):
+                changed.append(i)
+        return np.array(changed, dtype=np.intp)
+
+    def recalibrate(self, changed):
+        """
+        Recompute the Max LTV of the `changed` pairs in every pool and republish the pools in which a `max_ltv` moved by more than
+        `threshold` since the last published configuration. Returns {output: changes} of the republished pools.
+        """
+        changed_pairs = {self.pairs[i] for i in changed}
+        volatility = self.volatility()
+        republished = {}
+        for spec in self.specs:
+            affected = [copy.deepcopy(p) for p in spec["pair_parameters"] if (p["collateral_asset_name"], p["debt_asset_name"]) in changed_pairs]
+            if not affected:
+                continue
+            compute_ltvs(affected, volatility, self.liquidity)
+            current = self.current[spec["output"]]
+            current.update({(p["collateral_asset_name"], p["debt_asset_name"]): p["max_ltv"] for p in affected})
+            published = {(p["collateral_asset_name"], p["debt_asset_name"]): p["max_ltv"] for p in self.published[spec["output"]]["pair_parameters"]}
+            if max(round(abs(current[pair] - published[pair]), 9) for pair in current) <= self.threshold:
+                continue
+            config = self._generate(spec)
+            changes = diff_configs(self.published[spec["output"]], config, file=spec["output"])
+            self._publish(spec, config, changes)
+            republished[spec["output"]] = changes
+        return republished
+
+    def read_drop(self, path):
+        """
+        Load a dropped file as ("prices", days) or ("liquidity", rows). Price files are checked day by day like `append_day`, so an
+        incomplete file raises a `ValueError` before anything is applied.
+        """
+        path = Path(path)
+        with open(path) as infile:
+            data = json.load(infile)
+        if path.name.endswith('.liquidity.json'):
+            return "liquidity", data
+        days = sorted(data if isinstance(data, list) else [data], key=lambda d: d["date"])
+        listed = self._listed()
+        for day in days:
+            if pd.Timestamp(day["date"]) > self.last_day:
+                try:
+                    listed |= ~np.isnan(self._row(day["date"], day["prices"], listed))
+                except ValueError as error:
+                    raise ValueError(f'{path.name}: {error}') from None
+        return "prices", days
+
+    def ingest(self, paths):
+        """
+        Apply dropped price and liquidity files (in name order) and recalibrate once. Returns {output: changes} of republished pools.
+        All files are read and checked first, so an invalid file raises a `ValueError` without applying any of them.
+        """
+        drops = [self.read_drop(path) for path in sorted(map(Path, paths))]
+        changed = set()
+        for kind, data in drops:
+            if kind == "liquidity":
+                changed.update(self.update_liquidity(data).tolist())
+            else:
+                for day in data:
+                    changed.update(self.append_day(day["date"], day["prices"]).tolist())
+        return self.recalibrate(sorted(changed)) if changed else {}
+
+    def fetch_new_days(self, **fetch_kwargs):
+        """Fetch the completed days after the last known day and recalibrate. Returns {output: changes} of republished pools."""
+        from .cache import today
+        from .fetch import fetch_all_prices
+        # days on which CoinGecko lacks a price keep the last known price
+        prices = fetch_all_prices(self.columns, **fetch_kwargs).ffill()
+        new = prices[(prices.index > self.last_day) & (prices.index < today())]
+        changed = set()
+        for date, row in new.iterrows():
+            changed.update(self.append_day(date, row.dropna().to_dict()).tolist())
+        return self.recalibrate(sorted(changed)) if changed else {}
+
+    def run(self, drop_dir, poll=10, interval=None, fetch_kwargs=None, iterations=None):
+        """
+        Poll `drop_dir` every `poll` seconds and, with `interval`, fetch new days every `interval` seconds. Runs forever unless
+        `iterations` is given.
+        """
+        drop_dir = Path(drop_dir)
+        processed, rejected = drop_dir / 'processed', drop_dir / 'rejected'
+        processed.mkdir(parents=True, exist_ok=True)
+        rejected.mkdir(parents=True, exist_ok=True)
+        next_fetch = time.monotonic()
+        count = 0
+        while iterations is None or count < iterations:
+            count += 1
+            republished = {}
+            files = sorted(p for p in drop_dir.glob('*.json') if p.name.endswith(('.prices.json', '.liquidity.json')))
+            valid = []
+            for path in files:
+                try:
+                    self.read_drop(path)
+                    valid.append(path)
+                except (ValueError, KeyError, json.JSONDecodeError) as error:
+                    print(f'Rejected {path.name}: {error}', file=sys.stderr)
+                    path.replace(rejected / path.name)
+            if valid:
+                republished.update(self.ingest(valid))
+                for path in valid:
+                    path.replace(processed / path.name)
+            if interval is not None and time.monotonic() >= next_fetch:
+                republished.update(self.fetch_new_days(**(fetch_kwargs or {})))
+                next_fetch = time.monotonic() + interval
+            for output, changes in republished.items():
+                print(f'Wrote {self.out_dir / output}')
+                print(format_changes(changes))
+            if iterations is None or count < iterations:
+                time.sleep(poll)
+
+
+def _liquidity_key(row):
+    return row["debt_asset_name"], row["collateral_asset_name"], round(row["depth"], 2)